@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Dashboard refresh micro-benchmark (480x320, Pi system dashboard layout)
+
+Compares the old refresh (new image, redraw boxes/titles/nav/bars/values,
+convert the whole frame) with streamdeck_widgets: static chrome rendered
+once into a base layer, refreshes composite only the widgets. Run it on
+the Pi to get the per-refresh budget:
+
+    python3 benchmarks/bench_dashboard.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import streamdeck_pack
+import streamdeck_widgets
+
+WIDTH, HEIGHT = 480, 320
+NAV_Y = HEIGHT - 38
+BG_COLOR = (8, 8, 18)
+CYBER_ORANGE = (255, 160, 0)
+CYBER_GOLD = (255, 200, 50)
+CYBER_BRIGHT = (255, 230, 120)
+BOX_W, BOX_H = (WIDTH - 30) // 2, NAV_Y - 20
+
+font_medium = streamdeck_pack._load_font(16)
+font_small = streamdeck_pack._load_font(13)
+streamdeck_widgets.text_cache.add_atlas(font_small)
+
+def draw_chrome(draw):
+    for bx, title in ((5, "RASPBERRY PI"), (5 + BOX_W + 10, "SYSTEM")):
+        draw.rectangle([bx - 1, 4, bx + BOX_W + 1, 6 + BOX_H], outline=(63, 40, 0), width=1)
+        draw.rectangle([bx, 5, bx + BOX_W, 5 + BOX_H], outline=CYBER_ORANGE, width=3)
+        draw.text((bx + 10, 13), title, fill=CYBER_BRIGHT, font=font_medium)
+    draw.rectangle([0, NAV_Y, WIDTH, HEIGHT], fill=(10, 10, 18))
+    draw.line([0, NAV_Y, WIDTH, NAV_Y], fill=CYBER_ORANGE, width=2)
+
+def draw_bar(draw, x, y, pct, empty=True):
+    filled = int(8 * pct / 100)
+    for i in range(8):
+        sx = x + i * 12
+        if i < filled:
+            draw.rectangle([sx, y, sx + 9, y + 16], fill=(0, 255, 100))
+        elif empty:
+            draw.rectangle([sx, y, sx + 9, y + 16], fill=(20, 20, 30), outline=(50, 50, 60))
+
+def rows(values):
+    return [(40 + i * 28, name, pct) for i, (name, pct) in enumerate(values)]
+
+def old_refresh(values, converter, fb_array):
+    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
+    draw = ImageDraw.Draw(img)
+    draw_chrome(draw)
+    for y, name, pct in rows(values):
+        draw_bar(draw, 15, y, pct)
+        draw.text((120, y), f"{name}: {pct}%", fill=CYBER_GOLD, font=font_small)
+    converter.convert(img, out=fb_array)
+
+def build_dashboard(values):
+    dash = streamdeck_widgets.Dashboard(draw_chrome, WIDTH, HEIGHT, BG_COLOR)
+    for y, name, pct in rows(values):
+        dash.add(name + "_bar", streamdeck_widgets.Widget(
+            (15, y, 112, y + 17),
+            lambda draw, pct, y=y: draw_bar(draw, 15, y, pct, empty=False),
+            key=lambda pct: int(8 * pct / 100),
+            static=lambda draw, y=y: draw_bar(draw, 15, y, 0)))
+        dash.add(name + "_label", streamdeck_widgets.Label(120, y, font_small, CYBER_GOLD))
+    return dash
+
+def set_values(dash, values):
+    for name, pct in values:
+        dash.set(name + "_bar", pct)
+        dash.set(name + "_label", f"{name}: {pct}%")
+
+def bench(name, fn, iterations):
+    fn()  # warm up
+    times = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+    avg, worst = sum(times) / len(times), max(times)
+    print(f"{name:<34} {avg * 1000:8.3f} ms avg  {worst * 1000:8.3f} ms worst")
+    return avg
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fb_array = np.zeros((HEIGHT, WIDTH), dtype=np.uint16)
+    converter = streamdeck_pack.RGB565Converter(WIDTH, HEIGHT)
+
+    def values(i):
+        # CPU moves every tick, the rest changes now and then
+        return [("CPU", i * 7 % 100), ("TEMP", 40 + i // 50 % 20), ("MEM", 35), ("DISK", 62)]
+
+    dash = build_dashboard(values(0))
+    dash.render_base(converter)
+
+    # Widget output must match a full redraw of the same values
+    old_refresh(values(3), converter, fb_array)
+    expected = fb_array.copy()
+    streamdeck_widgets.release_screen()
+    set_values(dash, values(3))
+    dash.present(fb_array, converter)
+    if not np.array_equal(expected, fb_array):
+        print("ERROR: widget output differs from a full redraw")
+        sys.exit(1)
+
+    def come_on_screen(i=0):
+        streamdeck_widgets.release_screen()
+        set_values(dash, values(i))
+        dash.present(fb_array, converter)
+
+    def steady(i=0):
+        set_values(dash, values(i))
+        dash.present(fb_array, converter)
+
+    print(f"{WIDTH}x{HEIGHT} system dashboard refresh, {iterations} iterations")
+    old = bench("old full redraw", lambda i=0: old_refresh(values(i), converter, fb_array), iterations)
+    bench("widgets: dashboard comes on screen", come_on_screen, iterations)
+    new = bench("widgets: steady refresh", steady, iterations)
+    print(f"steady refresh speedup: {old / new:.2f}x")
+    print(f"text cache: {streamdeck_widgets.text_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
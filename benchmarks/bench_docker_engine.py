@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Docker source micro-benchmark (Windows agent)
+
+Runs windows_agent_sources.DockerEngine against benchmarks/fake_dockerd.py,
+checks its event-fed table matches what the daemon lists after containers
+are stopped, started, created and removed, and measures how long an event
+takes to reach the table. Then compares serving /docker/containers and
+/docker/stats from the table with asking the daemon per request: a fresh
+API connection each time, or with --real the `docker` CLI commands the
+agent used to fork against the local daemon:
+
+    python3 benchmarks/bench_docker_engine.py [iterations] [--real]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import windows_agent_sources
+import fake_dockerd
+
+def bench(name, fn, iterations):
+    fn()  # warm up
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    avg, worst = sum(times) / len(times), max(times)
+    print(f"{name:<34} {avg * 1000:8.3f} ms avg  {worst * 1000:8.3f} ms worst")
+    return avg
+
+def wait_for(condition, timeout=5.0):
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            print("ERROR: the container table never caught up with the daemon")
+            sys.exit(1)
+        time.sleep(0.0005)
+    return time.perf_counter() - start
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    iterations = int(args[0]) if args else 200
+    real = "--real" in sys.argv
+
+    dockerd = None
+    if real:
+        host = windows_agent_sources.DOCKER_HOST
+    else:
+        dockerd = fake_dockerd.FakeDockerd().start()
+        ids = fake_dockerd.populate(dockerd)
+        host = dockerd.host
+
+    def listed():
+        """What the daemon says right now, as agent rows"""
+        api = windows_agent_sources.docker_connection(host, 5)
+        try:
+            api.request("GET", "/containers/json")
+            rows = [windows_agent_sources.container_row(c) for c in json.loads(api.getresponse().read())]
+        finally:
+            api.close()
+        return {'containers': rows, 'count': len(rows)}
+
+    docker = windows_agent_sources.DockerEngine(host=host)
+    docker.start()
+    wait_for(lambda: docker.connected)
+    if docker.containers() != listed():
+        print("ERROR: container table differs from the daemon's listing")
+        sys.exit(1)
+
+    if dockerd:
+        latencies = []
+        for i in range(20):
+            target = ids[i % len(ids)]
+            dockerd.stop(target)
+            latencies.append(wait_for(lambda: docker.summary()['running'] == len(ids) - 1))
+            dockerd.start_container(target)
+            latencies.append(wait_for(lambda: docker.summary()['running'] == len(ids)))
+        extra = dockerd.run("scratch", "example/scratch:latest", [(9999, 80)])
+        wait_for(lambda: docker.summary()['total'] == len(ids) + 1)
+        dockerd.remove(extra)
+        wait_for(lambda: docker.summary()['total'] == len(ids))
+        dockerd.pull("example/new:1")
+        wait_for(lambda: docker.summary()['images'] == len(ids) + 1)
+        if docker.containers() != listed():
+            print("ERROR: container table drifted from the daemon after events")
+            sys.exit(1)
+        print(f"event -> table: {sum(latencies) / len(latencies) * 1000:.2f} ms avg, {max(latencies) * 1000:.2f} ms worst")
+
+    print(f"Docker data per request ({'local daemon' if real else 'fake dockerd'}), {docker.summary()['total']} containers, {iterations} iterations")
+    if real:
+        def old_containers():
+            subprocess.run(['docker', 'ps', '--format', '{{json .}}'], capture_output=True, timeout=10)
+        def old_stats():
+            for command in (['docker', 'ps', '-q'], ['docker', 'ps', '-aq'], ['docker', 'images', '-q']):
+                subprocess.run(command, capture_output=True, timeout=5)
+        old = bench("old: docker ps", old_containers, max(1, iterations // 10))
+        bench("old: /docker/stats (3 commands)", old_stats, max(1, iterations // 10))
+    else:
+        old = bench("per request: connect + list", listed, iterations)
+    new = bench("table: containers()", docker.containers, iterations * 10)
+    bench("table: summary()", docker.summary, iterations * 10)
+    print(f"speedup: {old / new:.0f}x")
+    print(f"engine: {docker.stats()}")
+    if dockerd:
+        dockerd.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+GPU telemetry micro-benchmark (Windows agent)
+
+Compares the old per-sample `nvidia-smi --query-gpu=...` fork with reading
+the latest value of windows_agent_sources.GpuTelemetry, which keeps one
+`nvidia-smi -lms N` streaming. Without an NVIDIA driver it runs against
+benchmarks/fake_nvidia_smi.py, which also checks that the streamed
+readings parse like the one-shot ones:
+
+    python3 benchmarks/bench_gpu_telemetry.py [iterations] [--real]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import windows_agent_sources
+
+def bench(name, fn, iterations):
+    fn()  # warm up
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    avg, worst = sum(times) / len(times), max(times)
+    print(f"{name:<34} {avg * 1000:8.3f} ms avg  {worst * 1000:8.3f} ms worst")
+    return avg
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    iterations = int(args[0]) if args else 20
+    real = "--real" in sys.argv
+    command = windows_agent_sources.NVIDIA_SMI if real else [sys.executable, os.path.join(HERE, "fake_nvidia_smi.py")]
+
+    def one_shot():
+        out = subprocess.run(command + [f"--query-gpu={windows_agent_sources.GPU_FIELDS}", "--format=csv,noheader,nounits"],
+                             capture_output=True, text=True, timeout=5).stdout
+        return windows_agent_sources.parse_gpu_line(out.splitlines()[0])[1]
+
+    gpu = windows_agent_sources.GpuTelemetry(interval_ms=100, command=command, use_nvml=real)
+    gpu.start()
+    deadline = time.monotonic() + 5
+    while gpu.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    streamed = gpu.latest()
+    if streamed is None:
+        print("ERROR: no reading from the telemetry stream")
+        sys.exit(1)
+    if set(streamed) != set(one_shot()):
+        print("ERROR: streamed reading has different fields than a one-shot query")
+        sys.exit(1)
+
+    print(f"GPU reading per stats collection ({'real GPU' if real else 'fake nvidia-smi'}), {iterations} iterations")
+    old = bench("old: fork nvidia-smi per sample", one_shot, iterations)
+    new = bench("stream: latest reading", gpu.latest, iterations * 100)
+    print(f"speedup: {old / new:.0f}x")
+    time.sleep(1)
+    print(f"telemetry: {gpu.stats()}")
+
+if __name__ == "__main__":
+    main()
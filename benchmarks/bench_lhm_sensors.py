@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+LibreHardwareMonitor sensor micro-benchmark (Windows agent)
+
+Compares the old recursive walk of LHM's data.json (string matching on
+every node, every sample) with windows_agent_sources.LhmSensors, which
+indexes the CPU temperature and fan sensors by SensorId once and then
+follows their paths. Runs on the recorded benchmarks/lhm_data.json and
+checks both give the same readings, then times fetching it from a local
+HTTP server with a new connection per request vs one keep-alive session:
+
+    python3 benchmarks/bench_lhm_sensors.py [iterations] [--url http://localhost:8085/data.json]
+"""
+
+import copy
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import windows_agent_sources
+
+FIXTURE = os.path.join(HERE, "lhm_data.json")
+
+# The agent's collection code before the index
+def find_cpu_temp(node):
+    if isinstance(node, dict):
+        text = node.get('Text', '')
+        if 'CPU' in text and node.get('Min') and 'Core' in text:
+            try:
+                val = node.get('Value', '0')
+                if '°C' in str(val):
+                    return float(val.replace('°C', '').strip())
+            except:
+                pass
+        for child in node.get('Children', []):
+            result = find_cpu_temp(child)
+            if result:
+                return result
+    return None
+
+def find_all_fans(node):
+    results = []
+    if isinstance(node, dict):
+        if node.get('Type', '') == 'Fan':
+            try:
+                val = node.get('Value', '0')
+                if 'RPM' in str(val):
+                    rpm = int(float(val.replace('RPM', '').strip()))
+                    results.append({'name': node.get('Text', ''), 'rpm': rpm, 'id': node.get('SensorId', '')})
+            except:
+                pass
+        for child in node.get('Children', []):
+            results.extend(find_all_fans(child))
+    return results
+
+def old_read(data):
+    return {'cpu_temp': find_cpu_temp(data) or 0, 'fans': find_all_fans(data)}
+
+def bench(name, fn, iterations):
+    fn()  # warm up
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    avg, worst = sum(times) / len(times), max(times)
+    print(f"{name:<34} {avg * 1000:8.3f} ms avg  {worst * 1000:8.3f} ms worst")
+    return avg
+
+def serve(body):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/data.json"
+
+def check(sensors, data, what):
+    if sensors.read(data) != old_read(data):
+        print(f"ERROR: indexed reading differs from the walk ({what})")
+        sys.exit(1)
+
+def main():
+    args = sys.argv[1:]
+    url = None
+    if "--url" in args:
+        i = args.index("--url")
+        url = args[i + 1]
+        del args[i:i + 2]
+    iterations = int(args[0]) if args else 2000
+    if url:
+        body = requests.get(url, timeout=2).content
+    else:
+        with open(FIXTURE, "rb") as f:
+            body = f.read()
+    data = json.loads(body)
+
+    sensors = windows_agent_sources.LhmSensors()
+    check(sensors, data, "recorded tree")
+    # A sensor value changing keeps the index; a fan disappearing re-indexes
+    changed = copy.deepcopy(data)
+    for path in sensors.paths.values():
+        node = changed
+        for i in path:
+            node = node['Children'][i]
+        node['Value'] = "1234 " + node['Value'].split()[1]
+    check(sensors, changed, "values changed")
+    builds = sensors.indexes
+    if builds != 1:
+        print("ERROR: changed sensor values rebuilt the index")
+        sys.exit(1)
+    removed = copy.deepcopy(data)
+    fan_path = sensors.paths[sensors.fans[0]]
+    parent = removed
+    for i in fan_path[:-1]:
+        parent = parent['Children'][i]
+    del parent['Children'][fan_path[-1]]
+    check(sensors, removed, "fan removed")
+    if sensors.indexes != builds + 1:
+        print("ERROR: removing a sensor did not rebuild the index")
+        sys.exit(1)
+    check(sensors, data, "fan back")
+
+    nodes = windows_agent_sources.tree_shape(data)[0] + 1
+    print(f"LHM data.json, {len(body)} bytes, {nodes} nodes, {len(sensors.paths)} sensors indexed, {iterations} iterations")
+    old = bench("old: walk the tree", lambda: old_read(data), iterations)
+    new = bench("indexed: SensorId paths", lambda: sensors.read(data), iterations)
+    print(f"speedup: {old / new:.0f}x")
+
+    server_url = url or serve(body)
+    fetches = max(1, iterations // 10)
+    session = requests.Session()
+    cold = bench("fetch: new connection each", lambda: requests.get(server_url, timeout=2).json(), fetches)
+    warm = bench("fetch: keep-alive session", lambda: session.get(server_url, timeout=2).json(), fetches)
+    print(f"speedup: {cold / warm:.1f}x")
+
+if __name__ == "__main__":
+    main()
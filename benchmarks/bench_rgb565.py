@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+RGB565 conversion micro-benchmark (480x320, one dashboard frame)
+
+Compares the old write_to_fb path (uint16 copy, shifted temporaries, astype,
+tobytes, mmap write) with streamdeck_pack.RGB565Converter writing straight
+into a framebuffer-sized mmap. Run it on the Pi to get real numbers:
+
+    python3 benchmarks/bench_rgb565.py [iterations]
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import streamdeck_pack
+
+WIDTH, HEIGHT = 480, 320
+
+def make_frame():
+    img = Image.new("RGB", (WIDTH, HEIGHT), (8, 8, 18))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, WIDTH, 6):
+        draw.line([i, 0, WIDTH - i, HEIGHT], fill=(i % 256, (i * 3) % 256, (i * 7) % 256))
+    return img
+
+def old_write_to_fb(img, fb_mmap):
+    arr = np.array(img, dtype=np.uint16)
+    rgb565 = ((arr[:,:,0] >> 3) << 11) | ((arr[:,:,1] >> 2) << 5) | (arr[:,:,2] >> 3)
+    fb_mmap.seek(0)
+    fb_mmap.write(rgb565.astype(np.uint16).tobytes())
+
+def bench(name, fn, iterations):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_frame = (time.perf_counter() - start) / iterations
+    print(f"{name:<32} {per_frame * 1000:8.3f} ms/frame  ({1 / per_frame:7.1f} fps)")
+    return per_frame
+
+def compare(img, fb_mmap, iterations):
+    """Check and time both paths; the numpy view of fb_mmap lives only in here"""
+    fb_array = np.frombuffer(fb_mmap, dtype=np.uint16).reshape(HEIGHT, WIDTH)
+    converter = streamdeck_pack.RGB565Converter(WIDTH, HEIGHT)
+
+    old_write_to_fb(img, fb_mmap)
+    expected = fb_array.copy()
+    converter.convert(img, out=fb_array)
+    if not np.array_equal(expected, fb_array):
+        print("ERROR: converter output differs from the old path")
+        sys.exit(1)
+
+    print(f"{WIDTH}x{HEIGHT} RGB -> RGB565, {iterations} iterations")
+    old = bench("old write_to_fb", lambda: old_write_to_fb(img, fb_mmap), iterations)
+    new = bench("RGB565Converter -> fb_array", lambda: converter.convert(img, out=fb_array), iterations)
+    print(f"speedup: {old / new:.2f}x")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    img = make_frame()
+
+    with tempfile.TemporaryFile() as f:
+        f.truncate(WIDTH * HEIGHT * 2)
+        fb_mmap = mmap.mmap(f.fileno(), WIDTH * HEIGHT * 2)
+        compare(img, fb_mmap, iterations)
+        fb_mmap.close()
+
+if __name__ == "__main__":
+    main()
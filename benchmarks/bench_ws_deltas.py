@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Agent WebSocket push micro-benchmark
+
+Replays a drifting Windows stats / Docker table through the old full
+broadcast and through windows_agent_sources.TopicPublisher (snapshot, then
+per-topic field deltas), decoding the latter with the Pi's
+streamdeck_fetch.StreamSubscriber subscribed to the topics the dashboards
+draw. Checks every tick that the Pi's store matches the agent's data, then
+compares bytes sent and the Pi's time per message:
+
+    python3 benchmarks/bench_ws_deltas.py [ticks]
+"""
+
+import json
+import math
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+import streamdeck_fetch
+import windows_agent_sources
+
+PI_TOPICS = {"cpu": "windows", "gpu": "windows", "memory": "windows", "disk": "windows", "network": "windows",
+             "system": "windows", "docker": "docker"}
+
+def system_stats(tick):
+    """Shaped like collect_system_stats(): load and temperatures move, totals don't"""
+    load = round(20 + 15 * math.sin(tick / 4), 1)
+    return {
+        'cpu_percent': load, 'cpu_count': 16, 'cpu_freq_current': 3600 + 100 * (tick % 3), 'cpu_freq_max': 3600,
+        'cpu_per_core': [round((load + 7 * i + tick) % 100, 1) for i in range(16)],
+        'ram_percent': 41.2 + (tick // 10) % 2 / 10, 'ram_used_gb': 13.1, 'ram_total_gb': 31.9, 'ram_available_gb': 18.8,
+        'disk_percent': 62.4, 'disk_used_gb': 581.0, 'disk_total_gb': 931.0, 'disk_free_gb': 350.0,
+        'net_sent_gb': round(12.31 + tick / 1000, 2), 'net_recv_gb': round(88.02 + tick / 200, 2),
+        'gpu_percent': int(load // 2), 'gpu_mem_used_mb': 2140, 'gpu_mem_total_mb': 12288, 'gpu_temp': 44 + tick % 2,
+        'gpu_fan_percent': 30, 'gpu_power_w': round(31.4 + load / 3, 1), 'gpu_power_limit_w': 320.0,
+        'gpu_clock_mhz': 1410, 'gpu_name': 'NVIDIA GeForce RTX 3080',
+        'cpu_temp': round(45 + load / 5, 1), 'cpu_fan_rpm': 1100 + 10 * (tick % 5),
+        'fans': [{'name': f'System Fan #{i}', 'rpm': 850 + 7 * ((tick + i) % 4), 'id': f'/lpc/nct6798d/0/fan/{i}'} for i in range(6)],
+        'uptime_hours': round(51.2 + tick / 1200, 1), 'uptime_days': round((51.2 + tick / 1200) / 24, 2),
+        'process_count': 287 + tick % 3,
+    }
+
+def docker_containers(tick):
+    names = ["pihole", "homeassistant", "portainer", "nginx-proxy", "grafana", "prometheus", "jellyfin", "vaultwarden"]
+    rows = [{'name': n, 'image': f'example/{n}:latest', 'status': 'Up 2 days', 'ports': '0.0.0.0:8080->80/tcp',
+             'state': 'running', 'id': f'{i:012x}'} for i, n in enumerate(names) if not (n == "grafana" and tick % 50 > 40)]
+    return {'containers': rows, 'count': len(rows)}
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    publisher = windows_agent_sources.TopicPublisher()
+    store = streamdeck_fetch.DataStore()
+    subscriber = streamdeck_fetch.StreamSubscriber(store, "ws://unused", PI_TOPICS)
+    subscription = tuple(sorted(PI_TOPICS))
+    drawn = {field for topic in PI_TOPICS if topic in windows_agent_sources.SYSTEM_TOPICS
+             for field in windows_agent_sources.SYSTEM_TOPICS[topic]}
+
+    full_messages, delta_messages = [], []
+    for tick in range(ticks):
+        stats, docker = system_stats(tick), docker_containers(tick)
+        full_messages.append(json.dumps({"system_stats": stats, "docker_containers": docker}))
+        topics = windows_agent_sources.split_system_stats(stats)
+        topics["docker"] = docker
+        publisher.publish(topics)
+        if tick == 0:
+            message = publisher.message("snapshot", subscription)
+        else:
+            message = publisher.message("delta", subscription)
+            if publisher.message("delta", subscription) is not message:
+                print("ERROR: a second client with the same topics got a freshly built message")
+                sys.exit(1)
+        delta_messages.append(message)
+        subscriber.receive(message)
+        windows = {k: v for k, v in stats.items() if k in drawn or k not in windows_agent_sources.FIELD_TOPICS}
+        if store.get("windows") != windows or store.get("docker") != docker:
+            print(f"ERROR: Pi store differs from the agent's data at tick {tick}")
+            sys.exit(1)
+
+    full_bytes = sum(map(len, full_messages))
+    delta_bytes = sum(map(len, delta_messages))
+    print(f"{ticks} broadcasts, Pi subscribed to {', '.join(subscription)}")
+    print(f"full payload:   {full_bytes / ticks:8.0f} bytes/message")
+    print(f"topic deltas:   {delta_bytes / ticks:8.0f} bytes/message  ({full_bytes / delta_bytes:.1f}x less)")
+
+    def pi_cost(messages, decode):
+        start = time.perf_counter()
+        for message in messages:
+            decode(message)
+        return (time.perf_counter() - start) / len(messages)
+
+    def legacy_decode(message):
+        data = json.loads(message)
+        store.put("windows", data["system_stats"])
+        store.put("docker", data["docker_containers"])
+
+    replay = streamdeck_fetch.StreamSubscriber(streamdeck_fetch.DataStore(), "ws://unused", PI_TOPICS)
+    old = pi_cost(full_messages, legacy_decode)
+    new = pi_cost(delta_messages, replay.receive)
+    print(f"Pi per message: full {old * 1e6:.1f} us, deltas {new * 1e6:.1f} us ({old / new:.1f}x)")
+    print(f"agent: {publisher.encoded} topic encodes for {ticks} broadcasts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Stand-in for dockerd's Engine API on machines without Docker. Serves
+/_ping, /containers/json (all=1, filters={"id": [...]}), /images/json and
+a streaming /events over HTTP/1.1 from an in-memory table; run(), stop(),
+remove() and pull() change the table and emit the same events dockerd
+would. Versioned paths (/v1.43/...) are accepted.
+
+Used in-process by benchmarks/bench_docker_engine.py, or standalone (a
+container is stopped or started every few seconds) to point the agent at:
+
+    python3 benchmarks/fake_dockerd.py [port]
+    set DOCKER_HOST=tcp://127.0.0.1:2375
+"""
+
+import hashlib
+import http.server
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+class FakeDockerd:
+    def __init__(self, port=0):
+        self.lock = threading.Lock()
+        self.containers = {}  # id -> Engine API container dict
+        self.images = {}
+        self.subscribers = []
+        self.requests = 0
+        self.seq = 0
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.host = f"tcp://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        for subscriber in self.subscribers:
+            subscriber.put(None)
+
+    # ----- docker commands -----
+
+    def emit(self, kind, action, actor_id, attributes):
+        now = time.time()
+        event = {"status": action, "id": actor_id, "Type": kind, "Action": action,
+                 "Actor": {"ID": actor_id, "Attributes": attributes},
+                 "scope": "local", "time": int(now), "timeNano": int(now * 1e9)}
+        for subscriber in list(self.subscribers):
+            subscriber.put(event)
+
+    def pull(self, image):
+        image_id = "sha256:" + hashlib.sha256(image.encode()).hexdigest()
+        with self.lock:
+            self.images[image_id] = {"Id": image_id, "RepoTags": [image], "Created": int(time.time())}
+        self.emit("image", "pull", image, {"name": image})
+
+    def run(self, name, image, ports=()):
+        """Create and start a container; ports = [(public, private)]"""
+        with self.lock:
+            self.seq += 1
+            container_id = hashlib.sha256(f"{name}{self.seq}".encode()).hexdigest()
+            self.containers[container_id] = {
+                "Id": container_id, "Names": [f"/{name}"], "Image": image, "ImageID": "",
+                "Command": "/docker-entrypoint.sh", "Created": int(time.time()) * 1000 + self.seq,
+                "Ports": [p for public, private in ports for p in (
+                    {"IP": "0.0.0.0", "PrivatePort": private, "PublicPort": public, "Type": "tcp"},
+                    {"IP": "::", "PrivatePort": private, "PublicPort": public, "Type": "tcp"})],
+                "Labels": {}, "State": "created", "Status": "Created",
+            }
+        attributes = {"name": name, "image": image}
+        self.emit("container", "create", container_id, attributes)
+        self.start_container(container_id)
+        return container_id
+
+    def start_container(self, container_id):
+        with self.lock:
+            c = self.containers[container_id]
+            c["State"], c["Status"] = "running", "Up Less than a second"
+        self.emit("container", "start", container_id, {"name": c["Names"][0][1:], "image": c["Image"]})
+
+    def stop(self, container_id):
+        with self.lock:
+            c = self.containers[container_id]
+            c["State"], c["Status"] = "exited", "Exited (0) Less than a second ago"
+        attributes = {"name": c["Names"][0][1:], "image": c["Image"]}
+        self.emit("container", "kill", container_id, dict(attributes, signal="15"))
+        self.emit("container", "die", container_id, dict(attributes, exitCode="0"))
+        self.emit("container", "stop", container_id, attributes)
+
+    def remove(self, container_id):
+        with self.lock:
+            c = self.containers.pop(container_id)
+        self.emit("container", "destroy", container_id, {"name": c["Names"][0][1:], "image": c["Image"]})
+
+    # ----- HTTP -----
+
+    def listing(self, query):
+        show_all = query.get("all", ["0"])[0] in ("1", "true")
+        ids = json.loads(query.get("filters", ["{}"])[0]).get("id")
+        with self.lock:
+            found = [dict(c) for c in self.containers.values()
+                     if (show_all or c["State"] == "running")
+                     and (not ids or any(c["Id"].startswith(i) for i in ids))]
+        return sorted(found, key=lambda c: -c["Created"])
+
+    def handler(self):
+        dockerd = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def send_json(self, value):
+                body = json.dumps(value).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Api-Version", "1.43")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                dockerd.requests += 1
+                url = urlparse(self.path)
+                path = re.sub(r"^/v[0-9.]+", "", url.path)
+                query = parse_qs(url.query)
+                if path == "/_ping":
+                    body = b"OK"
+                    self.send_response(200)
+                    self.send_header("Api-Version", "1.43")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif path == "/containers/json":
+                    self.send_json(dockerd.listing(query))
+                elif path == "/images/json":
+                    with dockerd.lock:
+                        self.send_json(list(dockerd.images.values()))
+                elif path == "/events":
+                    self.stream_events(json.loads(query.get("filters", ["{}"])[0]).get("type"))
+                else:
+                    self.send_error(404)
+
+            def stream_events(self, types):
+                subscriber = queue.Queue()
+                dockerd.subscribers.append(subscriber)
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self.wfile.flush()
+                    while True:
+                        event = subscriber.get()
+                        if event is None:
+                            break
+                        if types and event["Type"] not in types:
+                            continue
+                        data = json.dumps(event).encode() + b"\n"
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    pass  # subscriber went away
+                finally:
+                    dockerd.subscribers.remove(subscriber)
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def populate(dockerd, count=12):
+    """A believable home-server table: images pulled, `count` containers running"""
+    names = ["pihole", "homeassistant", "portainer", "nginx-proxy", "grafana", "prometheus",
+             "node-exporter", "jellyfin", "qbittorrent", "vaultwarden", "uptime-kuma", "mosquitto"]
+    ids = []
+    for i in range(count):
+        name = names[i % len(names)] + ("" if i < len(names) else f"-{i}")
+        image = f"example/{names[i % len(names)]}:latest"
+        dockerd.pull(image)
+        ids.append(dockerd.run(name, image, [(8000 + i, 80)] if i % 2 == 0 else ()))
+    return ids
+
+if __name__ == "__main__":
+    dockerd = FakeDockerd(int(sys.argv[1]) if len(sys.argv) > 1 else 2375).start()
+    ids = populate(dockerd)
+    print(f"fake dockerd on {dockerd.host}, {len(ids)} containers")
+    running = True
+    while True:
+        time.sleep(5)
+        (dockerd.stop if running else dockerd.start_container)(ids[0])
+        running = not running
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Stand-in for `nvidia-smi --query-gpu=... --format=csv,noheader,nounits`
+on machines without a GPU. Prints one line per fake GPU with the requested
+fields; with -lms N / --loop-ms=N (or -l N / --loop=N seconds) it keeps
+printing every interval like the real tool, load and temperature drifting
+so consecutive readings differ. Arguments follow nvidia-smi's syntax (long
+options as --name=VALUE, short ones as -x VALUE); anything else fails like
+the real tool, so a malformed command line doesn't pass here.
+
+    python3 benchmarks/fake_nvidia_smi.py --query-gpu=index,utilization.gpu,name --format=csv,noheader,nounits -lms 500
+"""
+
+import math
+import sys
+import time
+
+GPUS = 1
+
+def reading(index, tick):
+    load = int(50 + 45 * math.sin(tick / 5 + index))
+    return {
+        "index": index,
+        "utilization.gpu": load,
+        "memory.used": 4000 + 20 * load,
+        "memory.total": 16376,
+        "temperature.gpu": 45 + load // 4,
+        "fan.speed": "[N/A]" if index else 30 + load // 3,
+        "power.draw": f"{60 + 2.5 * load:.2f}",
+        "power.limit": "320.00",
+        "clocks.current.graphics": 1200 + 15 * load,
+        "name": "NVIDIA GeForce RTX 4080",
+    }
+
+SHORT = {"-lms": "--loop-ms", "-l": "--loop", "-i": "--id"}
+
+def parse(args):
+    """nvidia-smi's syntax: long options as --name=VALUE, short ones as -x VALUE"""
+    options = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            if "=" not in arg:
+                raise SystemExit(f"Invalid combination of input arguments ({arg} needs =VALUE)")
+            name, value = arg.split("=", 1)
+            options[name] = value
+        elif arg in SHORT:
+            if i + 1 >= len(args):
+                raise SystemExit(f"Invalid combination of input arguments ({arg} needs a value)")
+            i += 1
+            options[SHORT[arg]] = args[i]
+        else:
+            raise SystemExit(f"Invalid combination of input arguments ({arg})")
+        i += 1
+    return options
+
+def main(args):
+    options = parse(args)
+    fields = options.get("--query-gpu", "index,name").split(",")
+    loop_ms = options.get("--loop-ms")
+    loop_s = options.get("--loop")
+    interval = int(loop_ms) / 1000 if loop_ms else float(loop_s) if loop_s else None
+    tick = 0
+    next_at = time.monotonic()
+    while True:
+        for index in range(GPUS):
+            values = reading(index, tick)
+            print(", ".join(str(values.get(field, "[N/A]")) for field in fields), flush=True)
+        if interval is None:
+            return
+        tick += 1
+        next_at += interval
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
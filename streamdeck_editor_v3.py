@@ -9,7 +9,7 @@ Stream Deck Editor v3
 - SSH upload to Pi
 - GIPHY browser integration
 
-Requirements: pip install paramiko pillow requests
+Requirements: pip install paramiko pillow requests numpy
 """
 
 import tkinter as tk
@@ -22,6 +22,12 @@ import copy
 import requests
 import threading
 import io
+import streamdeck_pack
+import streamdeck_widgets
+import streamdeck_loop
+import streamdeck_fetch
+import streamdeck_fb
+import streamdeck_metrics
 
 def cover_resize(img, target_w, target_h):
     """Resize image to cover target area, maintaining aspect ratio (crop if needed)"""
@@ -299,6 +305,14 @@ PI_USER = "cem"
 PI_PASS = "3235"
 PI_SCRIPT = "/home/cem/streamdeck_fast.py"
 PI_ICONS_DIR = "/home/cem/streamdeck_icons"
+PI_PACK = "/home/cem/streamdeck_frames.pack"
+PI_PACK_MODULE = "/home/cem/streamdeck_pack.py"
+PI_WIDGETS_MODULE = "/home/cem/streamdeck_widgets.py"
+PI_LOOP_MODULE = "/home/cem/streamdeck_loop.py"
+PI_FETCH_MODULE = "/home/cem/streamdeck_fetch.py"
+PI_FB_MODULE = "/home/cem/streamdeck_fb.py"
+PI_METRICS_MODULE = "/home/cem/streamdeck_metrics.py"
+PI_FONTS_DIR = "/home/cem/fonts"
 
 CONFIG_FILE = "streamdeck_config_v3.json"
 LIBRARY_FILE = "button_library.json"
@@ -730,11 +744,11 @@ class StreamDeckEditor:
 
     def get_button_pages(self):
         """Return only button-type pages (for script generation)"""
-        return [p for p in self.config["pages"] if p.get("type", "button") == "button"]
+        return streamdeck_pack.button_pages(self.config)
 
     def get_dashboard_pages(self):
         """Return only dashboard-type pages"""
-        return [p for p in self.config["pages"] if p.get("type") == "dashboard"]
+        return streamdeck_pack.dashboard_pages(self.config)
 
     def save_config(self):
         with open(CONFIG_FILE, 'w') as f:
@@ -1650,34 +1664,47 @@ class StreamDeckEditor:
 
         # Build the DASHBOARD_TYPES list for the generated script
         dashboard_types_list = [p.get("dashboard_type") for p in dashboard_pages]
+        dashboard_refresh_list = [p.get("refresh_interval", DASHBOARD_TYPES.get(p.get("dashboard_type"), {}).get("refresh_interval", 2))
+                                  for p in dashboard_pages]
         num_dashboard = len(dashboard_pages)
 
         bg_color = config.get("background_color", [25, 25, 35])
         windows_ip = self.ip_entry.get()
+        idle_timeout = config.get("idle_timeout", 600)
 
         # Determine which dashboard render functions to include
         has_system = "system_monitor" in dashboard_types_list
         has_windows = "windows_pc" in dashboard_types_list
         has_pihole = "pihole" in dashboard_types_list
         has_docker = "docker" in dashboard_types_list
+        # Only these dashboards fetch over HTTP; button actions go through streamdeck_fetch
+        imports = "import time, requests" if has_windows or has_pihole or has_docker else "import time"
 
         script = f'''#!/usr/bin/env python3
 """
 Unified StreamDeck - Cyberpunk Dashboards + Button Pages
 Auto-generated by StreamDeck Editor v3
 """
-import os, mmap, time, requests, threading, select, subprocess, json
+{imports}
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from evdev import InputDevice, ecodes
+import streamdeck_pack
+import streamdeck_widgets
+import streamdeck_loop
+import streamdeck_fetch
+import streamdeck_fb
+import streamdeck_metrics
 
 # ============== CONFIG ==============
 WINDOWS_PC_IP = "{windows_ip}"
 WINDOWS_PORT = 5555
+WINDOWS_WS_PORT = 5556
 FB_DEV = "/dev/fb1"
 TOUCH_DEV = "/dev/input/event0"
 WIDTH, HEIGHT = 480, 320
 ICONS_DIR = "{PI_ICONS_DIR}"
+PACK_FILE = "{PI_PACK}"
 
 CAL_X_MIN, CAL_X_MAX = 600, 3550
 CAL_Y_MIN, CAL_Y_MAX = 750, 3300
@@ -1705,6 +1732,7 @@ CYBER_PURPLE = (200, 100, 255)
 # Page layout - ordered list of page types
 DASHBOARD_TYPES = {dashboard_types_list}
 NUM_DASHBOARD_PAGES = {num_dashboard}
+DASHBOARD_REFRESH = {dashboard_refresh_list}  # repaint cadence (s) per dashboard page, from refresh_interval
 
 BUTTON_PAGES = {pages_code}
 
@@ -1720,13 +1748,13 @@ BTN_H = (HEIGHT - NAV_HEIGHT - (ROWS + 1) * MARGIN) // ROWS
 LEFT_NAV = (0, NAV_Y, 75, HEIGHT)
 RIGHT_NAV = (WIDTH - 75, NAV_Y, WIDTH, HEIGHT)
 
-# Framebuffer
-fb = os.open(FB_DEV, os.O_RDWR)
-fb_mmap = mmap.mmap(fb, WIDTH * HEIGHT * 2)
+# Framebuffer: everything draws into the off-screen fb_array and marks what it touched;
+# fb.present(), run by the event loop before it sleeps, puts the damage on screen
+fb = streamdeck_fb.Framebuffer(FB_DEV, WIDTH, HEIGHT)
+fb_array = fb.back
 
 current_page = 0
 gif_frame_indices = {{}}
-gif_cache = {{}}
 pihole_sid = None
 pihole_sid_time = 0
 
@@ -1744,12 +1772,17 @@ try:
 except:
     font_title = font_big = font_large = font_medium = font_small = font_tiny = font_btn = font_nav = ImageFont.load_default()
 
+# Digit glyph atlases for the dashboard value fonts (numbers are composited, not re-rasterised)
+for font in (font_small, font_medium, font_big, font_tiny):
+    streamdeck_widgets.text_cache.add_atlas(font)
+
 # ============== HELPER FUNCTIONS ==============
+rgb565_converter = streamdeck_pack.RGB565Converter(WIDTH, HEIGHT)
+
 def write_to_fb(img):
-    arr = np.array(img, dtype=np.uint16)
-    rgb565 = ((arr[:,:,0] >> 3) << 11) | ((arr[:,:,1] >> 2) << 5) | (arr[:,:,2] >> 3)
-    fb_mmap.seek(0)
-    fb_mmap.write(rgb565.astype(np.uint16).tobytes())
+    streamdeck_widgets.release_screen()
+    rgb565_converter.convert(img, out=fb_array)
+    fb.mark_all()
 
 def draw_nav_bar(draw, page_num):
     draw.rectangle([0, NAV_Y, WIDTH, HEIGHT], fill=(10, 10, 18))
@@ -1817,7 +1850,7 @@ def get_gradient_color(percent):
     else:
         return (255, 50, 30)
 
-def draw_segmented_bar(draw, x, y, w, h, percent, color=None, segments=10):
+def draw_segmented_bar(draw, x, y, w, h, percent, color=None, segments=10, empty=True):
     gap = 3
     segment_w = (w - (segments - 1) * gap) // segments
     filled = int(segments * percent / 100)
@@ -1829,7 +1862,7 @@ def draw_segmented_bar(draw, x, y, w, h, percent, color=None, segments=10):
             draw.rectangle([sx, y, sx + segment_w, y + h], fill=seg_color)
             highlight = (min(seg_color[0]+40, 255), min(seg_color[1]+40, 255), min(seg_color[2]+40, 255))
             draw.line([sx+1, y+1, sx + segment_w-1, y+1], fill=highlight, width=1)
-        else:
+        elif empty:
             draw.rectangle([sx, y, sx + segment_w, y + h], fill=(20, 20, 30), outline=(50, 50, 60))
 
 def draw_progress_bar(draw, x, y, w, h, percent, color, bg_color=(40, 42, 55)):
@@ -1838,132 +1871,128 @@ def draw_progress_bar(draw, x, y, w, h, percent, color, bg_color=(40, 42, 55)):
     if fill_w > 0:
         draw.rounded_rectangle([x + 1, y + 1, x + 1 + fill_w, y + h - 1], radius=2, fill=color)
 
-# ============== PI SYSTEM FUNCTIONS ==============
-def get_cpu_usage():
-    try:
-        with open('/proc/stat', 'r') as f:
-            line = f.readline()
-        parts = line.split()
-        idle = int(parts[4])
-        total = sum(int(p) for p in parts[1:])
-        if not hasattr(get_cpu_usage, 'last'):
-            get_cpu_usage.last = (idle, total)
-            return 0
-        last_idle, last_total = get_cpu_usage.last
-        get_cpu_usage.last = (idle, total)
-        idle_delta = idle - last_idle
-        total_delta = total - last_total
-        return int(100 * (1 - idle_delta / total_delta)) if total_delta else 0
-    except:
-        return 0
-
-def get_memory_usage():
-    try:
-        with open('/proc/meminfo', 'r') as f:
-            lines = f.readlines()
-        mem = {{}}
-        for line in lines[:5]:
-            parts = line.split()
-            mem[parts[0].rstrip(':')] = int(parts[1])
-        total = mem.get('MemTotal', 1)
-        available = mem.get('MemAvailable', 0)
-        used = total - available
-        percent = int(100 * used / total)
-        return percent, used // 1024, total // 1024
-    except:
-        return 0, 0, 0
-
-def get_cpu_temp():
-    try:
-        with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-            return int(f.read().strip()) / 1000
-    except:
-        return 0
-
-def get_uptime():
-    try:
-        with open('/proc/uptime', 'r') as f:
-            seconds = float(f.read().split()[0])
-        days = int(seconds // 86400)
-        hours = int((seconds % 86400) // 3600)
-        mins = int((seconds % 3600) // 60)
-        if days > 0:
-            return f"{{days}}d {{hours}}h"
-        elif hours > 0:
-            return f"{{hours}}h {{mins}}m"
-        else:
-            return f"{{mins}}m"
-    except:
-        return "?"
+# ============== DASHBOARD WIDGETS ==============
+Label = streamdeck_widgets.Label
+dashboards = {{}}
+DASHBOARD_BUILDERS = {{}}  # page type -> [(name, builder)], base layers rendered at startup
+
+def get_dashboard(name, page_num, builder):
+    """Dashboards are built once per page; their static chrome is rendered right away"""
+    key = (name, page_num)
+    if key not in dashboards:
+        dash = builder(page_num)
+        dash.render_base(rgb565_converter)
+        dashboards[key] = dash
+    return dashboards[key]
+
+def segmented_bar_widget(x, y, w, h, segments=10):
+    """Empty tracks live in the base layer, refreshes only paint the filled segments"""
+    return streamdeck_widgets.Widget(
+        (x, y, x + w + 1, y + h + 1),
+        lambda draw, pct: draw_segmented_bar(draw, x, y, w, h, pct, CYBER_ORANGE, segments, empty=False),
+        key=lambda pct: int(segments * pct / 100),
+        static=lambda draw: draw_segmented_bar(draw, x, y, w, h, 0, CYBER_ORANGE, segments))
+
+warming = False  # set while neighbour pages pre-composite off screen
+
+def present_dashboard(dash):
+    if warming:
+        dash.prepare(rgb565_converter)
+        return
+    for rect in dash.present(fb_array, rgb565_converter):
+        fb.mark(*rect)
+
+# Latest values from the background fetchers; renderers never wait on the network
+store = streamdeck_fetch.DataStore()
+DATA_SOURCES = {{}}  # page type -> (fetch, interval), one Fetcher thread each
+STALE_AFTER = 5      # seconds past two fetch intervals before cards show their data's age
+OFFLINE_AFTER = 60   # seconds without a good fetch before a source counts as offline
+
+def add_stale_markers(dash, boxes):
+    """Top-right corner of each (x, y, w) box shows how old its data is, empty while fresh"""
+    for i, (x, y, w) in enumerate(boxes):
+        dash.add(f"stale_{{i}}", Label(x + w - 40, y + 10, font_tiny, CYBER_RED))
+
+def stale_text(source):
+    age = store.age(source)
+    if age is None or age < STALE_AFTER + 2 * DATA_SOURCES[source][1]:
+        return ""
+    return streamdeck_fetch.age_text(age)
+
+def mark_stale(dash, source):
+    text = stale_text(source)
+    for name in dash.widgets:
+        if name.startswith("stale_"):
+            dash.set(name, text)
+
+def data_offline(source):
+    age = store.age(source)
+    return age is None or age > OFFLINE_AFTER
 
-def get_ip_address():
-    try:
-        result = subprocess.run(['hostname', '-I'], capture_output=True, text=True, timeout=2)
-        ips = result.stdout.strip().split()
-        return ips[0] if ips else "No IP"
-    except:
-        return "?"
+# ============== PI SYSTEM FUNCTIONS ==============
+# Kept-open /proc and /sys files, IP by ioctl, each metric on its own TTL
+pi_metrics = streamdeck_metrics.SystemMetrics()
 
-def get_disk_usage():
-    try:
-        st = os.statvfs('/')
-        total = st.f_blocks * st.f_frsize
-        free = st.f_bavail * st.f_frsize
-        used = total - free
-        percent = int(100 * used / total)
-        return percent, used // (1024**3), total // (1024**3)
-    except:
-        return 0, 0, 0
+def get_system_stats():
+    return pi_metrics.snapshot()
 '''
 
         # Conditionally include dashboard render functions
         if has_system:
             script += '''
 # ============== DASHBOARD: PI SYSTEM ==============
-def render_system_monitor_dashboard(page_num):
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    cpu = get_cpu_usage()
-    mem_pct, mem_used, mem_total = get_memory_usage()
-    temp = get_cpu_temp()
-    uptime = get_uptime()
-    ip = get_ip_address()
-    disk_pct, disk_used, disk_total = get_disk_usage()
+def build_system_monitor_dashboard(page_num):
     available_h = NAV_Y - 10
     box_w = (WIDTH - 30) // 2
     box_h = available_h - 10
     gap = 10
     start_x, start_y = 5, 5
-    bx, by = start_x, start_y
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "RASPBERRY PI", fill=CYBER_BRIGHT, font=font_medium)
+    lx, rx, by = start_x, start_x + box_w + gap, start_y
+
+    def paint_static(draw):
+        draw_cyber_box(draw, lx, by, box_w, box_h, CYBER_ORANGE)
+        draw.text((lx + 10, by + 8), "RASPBERRY PI", fill=CYBER_BRIGHT, font=font_medium)
+        draw_cyber_box(draw, rx, by, box_w, box_h, CYBER_ORANGE)
+        draw.text((rx + 10, by + 8), "SYSTEM", fill=CYBER_BRIGHT, font=font_medium)
+        draw.text((rx + 10, by + 38), "IP:", fill=CYBER_DIM, font=font_small)
+        draw.text((rx + 10, by + 66), "UP:", fill=CYBER_DIM, font=font_small)
+        draw_nav_bar(draw, page_num)
+
+    dash = streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
     row_y = by + 35
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, cpu, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"CPU: {cpu}%", fill=CYBER_GOLD, font=font_small)
-    row_y += 28
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, temp, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"TEMP: {temp:.0f}C", fill=CYBER_GOLD, font=font_small)
-    row_y += 28
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, mem_pct, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"MEM: {mem_pct}%", fill=CYBER_GOLD, font=font_small)
-    row_y += 28
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, disk_pct, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"DISK: {disk_pct}%", fill=CYBER_GOLD, font=font_small)
-    bx = start_x + box_w + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "SYSTEM", fill=CYBER_BRIGHT, font=font_medium)
-    row_y = by + 38
-    draw.text((bx + 10, row_y), "IP:", fill=CYBER_DIM, font=font_small)
-    draw.text((bx + 35, row_y), ip, fill=CYBER_CYAN, font=font_small)
-    row_y += 28
-    draw.text((bx + 10, row_y), "UP:", fill=CYBER_DIM, font=font_small)
-    draw.text((bx + 35, row_y), uptime, fill=CYBER_BRIGHT, font=font_medium)
-    row_y += 32
-    draw.text((bx + 10, row_y), f"RAM: {mem_used}/{mem_total}MB", fill=CYBER_GOLD, font=font_small)
-    row_y += 26
-    draw.text((bx + 10, row_y), f"DISK: {disk_used}/{disk_total}GB", fill=CYBER_GOLD, font=font_small)
-    draw_nav_bar(draw, page_num)
-    write_to_fb(img)
+    for name in ("cpu", "temp", "mem", "disk"):
+        dash.add(name + "_bar", segmented_bar_widget(lx + 10, row_y, 95, 16, 8))
+        dash.add(name + "_label", Label(lx + 115, row_y, font_small, CYBER_GOLD))
+        row_y += 28
+    dash.add("ip", Label(rx + 35, by + 38, font_small, CYBER_CYAN))
+    dash.add("uptime", Label(rx + 35, by + 66, font_medium, CYBER_BRIGHT))
+    dash.add("ram", Label(rx + 10, by + 98, font_small, CYBER_GOLD))
+    dash.add("disk", Label(rx + 10, by + 124, font_small, CYBER_GOLD))
+    add_stale_markers(dash, [(lx, by, box_w), (rx, by, box_w)])
+    return dash
+
+DASHBOARD_BUILDERS["system_monitor"] = [("system_monitor", build_system_monitor_dashboard)]
+DATA_SOURCES["system_monitor"] = (get_system_stats, 1.0)
+
+def render_system_monitor_dashboard(page_num):
+    dash = get_dashboard("system_monitor", page_num, build_system_monitor_dashboard)
+    stats = store.get("system_monitor")
+    if stats:
+        cpu, temp = stats["cpu"], stats["temp"]
+        mem_pct, mem_used, mem_total = stats["mem"]
+        disk_pct, disk_used, disk_total = stats["disk"]
+        dash.update({
+            "cpu_bar": cpu, "cpu_label": f"CPU: {cpu}%",
+            "temp_bar": temp, "temp_label": f"TEMP: {temp:.0f}C",
+            "mem_bar": mem_pct, "mem_label": f"MEM: {mem_pct}%",
+            "disk_bar": disk_pct, "disk_label": f"DISK: {disk_pct}%",
+            "ip": stats["ip"],
+            "uptime": stats["uptime"],
+            "ram": f"RAM: {mem_used}/{mem_total}MB",
+            "disk": f"DISK: {disk_used}/{disk_total}GB",
+        })
+    mark_stale(dash, "system_monitor")
+    present_dashboard(dash)
 '''
 
         if has_windows:
@@ -1976,69 +2005,77 @@ def get_windows_stats():
     except:
         return None
 
-def render_windows_pc_dashboard(page_num):
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    stats = get_windows_stats()
-    if not stats or 'error' in stats:
+def build_windows_pc_offline_dashboard(page_num):
+    def paint_static(draw):
         draw_cyber_box(draw, 100, 80, 280, 120, CYBER_ORANGE)
         draw.text((180, 110), "WINDOWS", fill=CYBER_BRIGHT, font=font_big)
         draw.text((175, 145), "OFFLINE", fill=CYBER_RED, font=font_medium)
         draw_nav_bar(draw, page_num)
-        write_to_fb(img)
-        return
+    return streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+
+def build_windows_pc_dashboard(page_num):
     available_h = NAV_Y - 10
     box_w = (WIDTH - 30) // 2
     box_h = (available_h - 15) // 2
     gap = 10
     start_x, start_y = 5, 5
-    bx, by = start_x, start_y
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
+    lx, rx = start_x, start_x + box_w + gap
+    ty, by = start_y, start_y + box_h + gap
+
+    def paint_static(draw):
+        draw_cyber_box(draw, lx, ty, box_w, box_h, CYBER_ORANGE)
+        draw_cyber_box(draw, rx, ty, box_w, box_h, CYBER_ORANGE)
+        draw_cyber_box(draw, lx, by, box_w, box_h, CYBER_ORANGE)
+        draw_cyber_box(draw, rx, by, box_w, box_h, CYBER_ORANGE)
+        draw.text((rx + 10, by + 8), "SYS", fill=CYBER_BRIGHT, font=font_medium)
+        draw.text((rx + 10, by + 32), "FAN:", fill=CYBER_DIM, font=font_small)
+        draw.text((rx + 10, by + 56), "NET:", fill=CYBER_DIM, font=font_small)
+        draw.text((rx + 10, by + 80), "UP:", fill=CYBER_DIM, font=font_small)
+        draw_nav_bar(draw, page_num)
+
+    dash = streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+    # Box 1: CPU, Box 2: GPU
+    for prefix, bx in (("cpu", lx), ("gpu", rx)):
+        dash.add(prefix + "_title", Label(bx + 10, ty + 8, font_medium, CYBER_BRIGHT))
+        row_y = ty + 32
+        for name in ("temp", "load", "third"):
+            dash.add(f"{prefix}_{name}_bar", segmented_bar_widget(bx + 10, row_y, 95, 16, 8))
+            dash.add(f"{prefix}_{name}_label", Label(bx + 115, row_y, font_small, CYBER_GOLD))
+            row_y += 26
+    # Box 3: RAM/Disk
+    dash.add("ram_title", Label(lx + 10, by + 8, font_medium, CYBER_BRIGHT))
+    dash.add("ram_label", Label(lx + 10, by + 30, font_small, CYBER_GOLD))
+    dash.add("ram_bar", segmented_bar_widget(lx + 10, by + 52, box_w - 25, 18, 12))
+    dash.add("disk_label", Label(lx + 10, by + 80, font_small, CYBER_GOLD))
+    # Box 4: System
+    dash.add("fan", Label(rx + 55, by + 32, font_small, CYBER_GOLD))
+    dash.add("net", Label(rx + 55, by + 56, font_small, CYBER_GOLD))
+    dash.add("uptime", Label(rx + 55, by + 80, font_medium, CYBER_BRIGHT))
+    add_stale_markers(dash, [(lx, ty, box_w), (rx, ty, box_w), (lx, by, box_w), (rx, by, box_w)])
+    return dash
+
+DASHBOARD_BUILDERS["windows_pc"] = [("windows_pc", build_windows_pc_dashboard), ("windows_pc_offline", build_windows_pc_offline_dashboard)]
+DATA_SOURCES["windows_pc"] = (get_windows_stats, 1.0)
+
+def render_windows_pc_dashboard(page_num):
+    stats = store.get("windows_pc")
+    if not stats or 'error' in stats or data_offline("windows_pc"):
+        present_dashboard(get_dashboard("windows_pc_offline", page_num, build_windows_pc_offline_dashboard))
+        return
+    dash = get_dashboard("windows_pc", page_num, build_windows_pc_dashboard)
     cpu = stats.get('cpu_percent', 0)
     cpu_temp = stats.get('cpu_temp', 0)
     cpu_count = stats.get('cpu_count', 0)
     cpu_freq = stats.get('cpu_freq_current', stats.get('cpu_freq', 0))
-    draw.text((bx + 10, by + 8), f"CPU ({cpu_count}c)", fill=CYBER_BRIGHT, font=font_medium)
-    row_y = by + 32
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, cpu_temp, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"TEMP: {cpu_temp:.0f}C", fill=CYBER_GOLD, font=font_small)
-    row_y += 26
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, cpu, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"LOAD: {cpu:.0f}%", fill=CYBER_GOLD, font=font_small)
-    row_y += 26
-    freq_pct = min(cpu_freq / 5000 * 100, 100)
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, freq_pct, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"FREQ: {int(cpu_freq)}", fill=CYBER_GOLD, font=font_small)
-    bx = start_x + box_w + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
     gpu = stats.get('gpu_percent', 0)
     gpu_temp = stats.get('gpu_temp', 0)
     gpu_power = stats.get('gpu_power_w', 0)
     gpu_name = stats.get('gpu_name', 'GPU').replace('NVIDIA ', '').replace('GeForce ', '')
-    draw.text((bx + 10, by + 8), f"GPU: {gpu_name[:10]}", fill=CYBER_BRIGHT, font=font_medium)
-    row_y = by + 32
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, gpu_temp, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"TEMP: {gpu_temp}C", fill=CYBER_GOLD, font=font_small)
-    row_y += 26
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, gpu, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"LOAD: {gpu}%", fill=CYBER_GOLD, font=font_small)
-    row_y += 26
-    pwr_pct = min(gpu_power / 320 * 100, 100)
-    draw_segmented_bar(draw, bx + 10, row_y, 95, 16, pwr_pct, CYBER_ORANGE, 8)
-    draw.text((bx + 115, row_y), f"PWR: {gpu_power:.0f}W", fill=CYBER_GOLD, font=font_small)
-    bx, by = start_x, start_y + box_h + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
     ram = stats.get('ram_percent', 0)
     ram_used = stats.get('ram_used_gb', 0)
     ram_total = stats.get('ram_total_gb', 0)
     disk = stats.get('disk_percent', 0)
     disk_free = stats.get('disk_free_gb', 0)
-    draw.text((bx + 10, by + 8), f"RAM: {ram_used:.0f}/{ram_total:.0f}GB", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 30), f"USED: {ram:.0f}%", fill=CYBER_GOLD, font=font_small)
-    draw_segmented_bar(draw, bx + 10, by + 52, box_w - 25, 18, ram, CYBER_ORANGE, 12)
-    draw.text((bx + 10, by + 80), f"DISK: {disk:.0f}%  |  {disk_free:.0f}GB FREE", fill=CYBER_GOLD, font=font_small)
-    bx = start_x + box_w + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
     gpu_fan = stats.get('gpu_fan_percent', 0)
     uptime_h = stats.get('uptime_hours', 0)
     net_recv = stats.get('net_recv_gb', 0)
@@ -2046,15 +2083,25 @@ def render_windows_pc_dashboard(page_num):
         uptime_str = f"{int(uptime_h // 24)}D {int(uptime_h % 24):02d}H"
     else:
         uptime_str = f"{uptime_h:.1f}H"
-    draw.text((bx + 10, by + 8), "SYS", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 32), "FAN:", fill=CYBER_DIM, font=font_small)
-    draw.text((bx + 55, by + 32), f"{gpu_fan}%", fill=CYBER_GOLD, font=font_small)
-    draw.text((bx + 10, by + 56), "NET:", fill=CYBER_DIM, font=font_small)
-    draw.text((bx + 55, by + 56), f"{net_recv:.1f}GB", fill=CYBER_GOLD, font=font_small)
-    draw.text((bx + 10, by + 80), "UP:", fill=CYBER_DIM, font=font_small)
-    draw.text((bx + 55, by + 80), uptime_str, fill=CYBER_BRIGHT, font=font_medium)
-    draw_nav_bar(draw, page_num)
-    write_to_fb(img)
+    dash.update({
+        "cpu_title": f"CPU ({cpu_count}c)",
+        "cpu_temp_bar": cpu_temp, "cpu_temp_label": f"TEMP: {cpu_temp:.0f}C",
+        "cpu_load_bar": cpu, "cpu_load_label": f"LOAD: {cpu:.0f}%",
+        "cpu_third_bar": min(cpu_freq / 5000 * 100, 100), "cpu_third_label": f"FREQ: {int(cpu_freq)}",
+        "gpu_title": f"GPU: {gpu_name[:10]}",
+        "gpu_temp_bar": gpu_temp, "gpu_temp_label": f"TEMP: {gpu_temp}C",
+        "gpu_load_bar": gpu, "gpu_load_label": f"LOAD: {gpu}%",
+        "gpu_third_bar": min(gpu_power / 320 * 100, 100), "gpu_third_label": f"PWR: {gpu_power:.0f}W",
+        "ram_title": f"RAM: {ram_used:.0f}/{ram_total:.0f}GB",
+        "ram_label": f"USED: {ram:.0f}%",
+        "ram_bar": ram,
+        "disk_label": f"DISK: {disk:.0f}%  |  {disk_free:.0f}GB FREE",
+        "fan": f"{gpu_fan}%",
+        "net": f"{net_recv:.1f}GB",
+        "uptime": uptime_str,
+    })
+    mark_stale(dash, "windows_pc")
+    present_dashboard(dash)
 '''
 
         if has_pihole:
@@ -2086,55 +2133,72 @@ def get_pihole_stats():
     except:
         return None
 
-def render_pihole_dashboard(page_num):
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    stats = get_pihole_stats()
-    if not stats:
+def build_pihole_offline_dashboard(page_num):
+    def paint_static(draw):
         draw_cyber_box(draw, 100, 80, 280, 120, CYBER_ORANGE)
         draw.text((170, 110), "PI-HOLE", fill=CYBER_BRIGHT, font=font_big)
         draw.text((160, 145), "CONNECTING...", fill=CYBER_GOLD, font=font_small)
         draw_nav_bar(draw, page_num)
-        write_to_fb(img)
-        return
-    queries = stats.get("queries", {})
-    total = queries.get("total", 0)
-    blocked = queries.get("blocked", 0)
-    pct = queries.get("percent_blocked", 0)
-    cached = queries.get("cached", 0)
-    forwarded = queries.get("forwarded", 0)
-    clients = stats.get("clients", {}).get("active", 0)
-    domains = stats.get("gravity", {}).get("domains_being_blocked", 0)
+    return streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+
+def build_pihole_dashboard(page_num):
     available_h = NAV_Y - 10
     box_w = (WIDTH - 30) // 2
     box_h = (available_h - 15) // 2
     gap = 10
     start_x, start_y = 5, 5
-    bx, by = start_x, start_y
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "QUERIES", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 32), f"{total:,}", fill=CYBER_CYAN, font=font_big)
-    draw.text((bx + 10, by + 65), f"{clients} CLIENTS", fill=CYBER_GOLD, font=font_small)
-    bx = start_x + box_w + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "BLOCKED", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 32), f"{blocked:,}", fill=CYBER_RED, font=font_big)
-    draw_segmented_bar(draw, bx + 10, by + 65, 120, 14, pct, CYBER_ORANGE, 10)
-    draw.text((bx + 140, by + 65), f"{pct:.1f}%", fill=CYBER_GOLD, font=font_small)
-    bx, by = start_x, start_y + box_h + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "TRAFFIC", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 35), "CACHED:", fill=CYBER_GOLD, font=font_small)
-    draw.text((bx + 80, by + 35), f"{cached:,}", fill=CYBER_PURPLE, font=font_small)
-    draw.text((bx + 10, by + 59), "FWD:", fill=CYBER_GOLD, font=font_small)
-    draw.text((bx + 80, by + 59), f"{forwarded:,}", fill=CYBER_CYAN, font=font_small)
-    bx = start_x + box_w + gap
-    draw_cyber_box(draw, bx, by, box_w, box_h, CYBER_ORANGE)
-    draw.text((bx + 10, by + 8), "BLOCKLIST", fill=CYBER_BRIGHT, font=font_medium)
-    draw.text((bx + 10, by + 35), f"{domains:,}", fill=CYBER_GREEN, font=font_medium)
-    draw.text((bx + 10, by + 58), "DOMAINS", fill=CYBER_GOLD, font=font_small)
-    draw_nav_bar(draw, page_num)
-    write_to_fb(img)
+    lx, rx = start_x, start_x + box_w + gap
+    ty, by = start_y, start_y + box_h + gap
+
+    def paint_static(draw):
+        draw_cyber_box(draw, lx, ty, box_w, box_h, CYBER_ORANGE)
+        draw.text((lx + 10, ty + 8), "QUERIES", fill=CYBER_BRIGHT, font=font_medium)
+        draw_cyber_box(draw, rx, ty, box_w, box_h, CYBER_ORANGE)
+        draw.text((rx + 10, ty + 8), "BLOCKED", fill=CYBER_BRIGHT, font=font_medium)
+        draw_cyber_box(draw, lx, by, box_w, box_h, CYBER_ORANGE)
+        draw.text((lx + 10, by + 8), "TRAFFIC", fill=CYBER_BRIGHT, font=font_medium)
+        draw.text((lx + 10, by + 35), "CACHED:", fill=CYBER_GOLD, font=font_small)
+        draw.text((lx + 10, by + 59), "FWD:", fill=CYBER_GOLD, font=font_small)
+        draw_cyber_box(draw, rx, by, box_w, box_h, CYBER_ORANGE)
+        draw.text((rx + 10, by + 8), "BLOCKLIST", fill=CYBER_BRIGHT, font=font_medium)
+        draw.text((rx + 10, by + 58), "DOMAINS", fill=CYBER_GOLD, font=font_small)
+        draw_nav_bar(draw, page_num)
+
+    dash = streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+    dash.add("total", Label(lx + 10, ty + 32, font_big, CYBER_CYAN))
+    dash.add("clients", Label(lx + 10, ty + 65, font_small, CYBER_GOLD))
+    dash.add("blocked", Label(rx + 10, ty + 32, font_big, CYBER_RED))
+    dash.add("pct_bar", segmented_bar_widget(rx + 10, ty + 65, 120, 14, 10))
+    dash.add("pct_label", Label(rx + 140, ty + 65, font_small, CYBER_GOLD))
+    dash.add("cached", Label(lx + 80, by + 35, font_small, CYBER_PURPLE))
+    dash.add("forwarded", Label(lx + 80, by + 59, font_small, CYBER_CYAN))
+    dash.add("domains", Label(rx + 10, by + 35, font_medium, CYBER_GREEN))
+    add_stale_markers(dash, [(lx, ty, box_w), (rx, ty, box_w), (lx, by, box_w), (rx, by, box_w)])
+    return dash
+
+DASHBOARD_BUILDERS["pihole"] = [("pihole", build_pihole_dashboard), ("pihole_offline", build_pihole_offline_dashboard)]
+DATA_SOURCES["pihole"] = (get_pihole_stats, 2.0)
+
+def render_pihole_dashboard(page_num):
+    stats = store.get("pihole")
+    if not stats or data_offline("pihole"):
+        present_dashboard(get_dashboard("pihole_offline", page_num, build_pihole_offline_dashboard))
+        return
+    dash = get_dashboard("pihole", page_num, build_pihole_dashboard)
+    queries = stats.get("queries", {})
+    pct = queries.get("percent_blocked", 0)
+    dash.update({
+        "total": f"{queries.get('total', 0):,}",
+        "clients": f"{stats.get('clients', {}).get('active', 0)} CLIENTS",
+        "blocked": f"{queries.get('blocked', 0):,}",
+        "pct_bar": pct,
+        "pct_label": f"{pct:.1f}%",
+        "cached": f"{queries.get('cached', 0):,}",
+        "forwarded": f"{queries.get('forwarded', 0):,}",
+        "domains": f"{stats.get('gravity', {}).get('domains_being_blocked', 0):,}",
+    })
+    mark_stale(dash, "pihole")
+    present_dashboard(dash)
 '''
 
         if has_docker:
@@ -2143,58 +2207,86 @@ def render_pihole_dashboard(page_num):
 def get_docker_data():
     try:
         resp = requests.get(f"http://{WINDOWS_PC_IP}:{WINDOWS_PORT}/docker/containers", timeout=5)
-        data = resp.json()
-        return data.get('containers', []), data.get('count', 0)
+        return resp.json()
     except:
-        return [], 0
+        return None
 
-def render_docker_dashboard(page_num):
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    containers, count = get_docker_data()
-    if not containers:
+def build_docker_offline_dashboard(page_num):
+    def paint_static(draw):
         draw_cyber_box(draw, 100, 80, 280, 120, CYBER_ORANGE)
         draw.text((180, 110), "DOCKER", fill=CYBER_BRIGHT, font=font_big)
         draw.text((155, 145), "NO CONTAINERS", fill=CYBER_GOLD, font=font_medium)
         draw_nav_bar(draw, page_num)
-        write_to_fb(img)
-        return
-    cols, rows = 3, 4
+    return streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+
+DOCKER_COLS, DOCKER_ROWS = 3, 4
+
+def container_card_widget(dash, x, y, card_w, card_h):
+    def paint(draw, card):
+        name, image, up, status_color, stale = card
+        draw.rectangle([x, y, x+card_w, y+card_h], fill=(15, 15, 25), outline=CYBER_ORANGE, width=2)
+        draw.rectangle([x+2, y+2, x+5, y+card_h-2], fill=status_color)
+        dash.text((x+10, y+4), name, CYBER_BRIGHT, font_small)
+        dash.text((x+10, y+20), image, (100, 80, 30), font_tiny)
+        if up:
+            dash.text((x+card_w-32, y+card_h-14), up, status_color, font_tiny)
+        if stale:
+            dash.text((x+10, y+card_h-14), stale, CYBER_RED, font_tiny)
+    return streamdeck_widgets.Widget((x, y, x + card_w + 1, y + card_h + 1), paint)
+
+def build_docker_dashboard(page_num):
     margin = 5
     start_y = 5
-    card_w = (WIDTH - margin * (cols + 1)) // cols
-    card_h = (NAV_Y - start_y - margin * (rows + 1)) // rows
-    for i, c in enumerate(containers[:12]):
-        row, col = i // cols, i % cols
+    card_w = (WIDTH - margin * (DOCKER_COLS + 1)) // DOCKER_COLS
+    card_h = (NAV_Y - start_y - margin * (DOCKER_ROWS + 1)) // DOCKER_ROWS
+
+    def paint_static(draw):
+        draw_nav_bar(draw, page_num)
+
+    dash = streamdeck_widgets.Dashboard(paint_static, WIDTH, HEIGHT, BG_COLOR)
+    for i in range(DOCKER_COLS * DOCKER_ROWS):
+        row, col = i // DOCKER_COLS, i % DOCKER_COLS
         x = margin + col * (card_w + margin)
         y = start_y + row * (card_h + margin)
-        status = c.get('status', '')
-        is_healthy = 'healthy' in status.lower()
-        is_up = 'up' in status.lower()
-        if is_healthy:
-            status_color = CYBER_GREEN
-        elif is_up:
-            status_color = CYBER_CYAN
-        else:
-            status_color = CYBER_RED
-        draw.rectangle([x, y, x+card_w, y+card_h], fill=(15, 15, 25), outline=CYBER_ORANGE, width=2)
-        draw.rectangle([x+2, y+2, x+5, y+card_h-2], fill=status_color)
-        name = c.get('name', '?')
-        for p in ['compassionate_', 'nervous_', 'elated_', 'determined_', 'naughty_', 'flamboyant_', 'upbeat_', 'suspicious_']:
-            if name.startswith(p):
-                name = name[len(p):]
-                break
-        name = name[:11] + '..' if len(name) > 13 else name
-        draw.text((x+10, y+4), name, fill=CYBER_BRIGHT, font=font_small)
-        image = c.get('image', '').split('/')[-1].split(':')[0]
-        image = image[:13] + '..' if len(image) > 15 else image
-        draw.text((x+10, y+20), image, fill=(100, 80, 30), font=font_tiny)
-        if 'Up' in status:
-            parts = status.replace('(healthy)', '').strip().split()
-            up = f"{parts[1]}{parts[2][0]}" if len(parts) >= 3 else "Up"
-            draw.text((x+card_w-32, y+card_h-14), up, fill=status_color, font=font_tiny)
-    draw_nav_bar(draw, page_num)
-    write_to_fb(img)
+        dash.add(f"card_{i}", container_card_widget(dash, x, y, card_w, card_h))
+    return dash
+
+def container_card(c):
+    status = c.get('status', '')
+    if 'healthy' in status.lower():
+        status_color = CYBER_GREEN
+    elif 'up' in status.lower():
+        status_color = CYBER_CYAN
+    else:
+        status_color = CYBER_RED
+    name = c.get('name', '?')
+    for p in ['compassionate_', 'nervous_', 'elated_', 'determined_', 'naughty_', 'flamboyant_', 'upbeat_', 'suspicious_']:
+        if name.startswith(p):
+            name = name[len(p):]
+            break
+    name = name[:11] + '..' if len(name) > 13 else name
+    image = c.get('image', '').split('/')[-1].split(':')[0]
+    image = image[:13] + '..' if len(image) > 15 else image
+    up = None
+    if 'Up' in status:
+        parts = status.replace('(healthy)', '').strip().split()
+        up = f"{parts[1]}{parts[2][0]}" if len(parts) >= 3 else "Up"
+    return (name, image, up, status_color)
+
+DASHBOARD_BUILDERS["docker"] = [("docker", build_docker_dashboard), ("docker_offline", build_docker_offline_dashboard)]
+DATA_SOURCES["docker"] = (get_docker_data, 3.0)
+
+def render_docker_dashboard(page_num):
+    data = store.get("docker")
+    containers = data.get('containers', []) if data and not data_offline("docker") else []
+    if not containers:
+        present_dashboard(get_dashboard("docker_offline", page_num, build_docker_offline_dashboard))
+        return
+    dash = get_dashboard("docker", page_num, build_docker_dashboard)
+    stale = stale_text("docker")
+    for i in range(DOCKER_COLS * DOCKER_ROWS):
+        dash.set(f"card_{i}", container_card(containers[i]) + (stale,) if i < len(containers) else None)
+    present_dashboard(dash)
 '''
 
         # Build the dispatch map and page selector
@@ -2202,14 +2294,14 @@ def render_docker_dashboard(page_num):
         dispatch_lines = []
         for i, dtype in enumerate(dashboard_types_list):
             func_name = f"render_{dtype}_dashboard"
-            dispatch_lines.append(f"    {'if' if i == 0 else 'elif'} current_page == {i}:")
+            dispatch_lines.append(f"    {'if' if i == 0 else 'elif'} page == {i}:")
             dispatch_lines.append(f"        {func_name}({i})")
 
         if dashboard_types_list:
             dispatch_lines.append(f"    else:")
-            dispatch_lines.append(f"        show_button_page(current_page - NUM_DASHBOARD_PAGES)")
+            dispatch_lines.append(f"        show_button_page(page - NUM_DASHBOARD_PAGES)")
         else:
-            dispatch_lines.append(f"    show_button_page(current_page)")
+            dispatch_lines.append(f"    show_button_page(page)")
 
         dispatch_code = "\n".join(dispatch_lines)
 
@@ -2248,19 +2340,20 @@ def render_page_selector():
     draw.text((WIDTH//2 - 70, NAV_Y + 8), "TAP OUTSIDE TO CANCEL", fill=(100, 80, 40), font=font_tiny)
     write_to_fb(img)
 
-def get_page_from_grid(sx, sy):
+def page_grid_rects():
+    """Inclusive (x1, y1, x2, y2) of each page selector card"""
     cols, rows = 3, 2
     margin = 15
     start_y = 40
     card_w = (WIDTH - margin * (cols + 1)) // cols
     card_h = (NAV_Y - start_y - margin * (rows + 1)) // rows
+    rects = []
     for i in range(min(TOTAL_PAGES, 6)):
         row, col = i // cols, i % cols
         x = margin + col * (card_w + margin)
         y = start_y + row * (card_h + margin)
-        if x <= sx <= x + card_w and y <= sy <= y + card_h:
-            return i
-    return -1
+        rects.append((x, y, x + card_w, y + card_h))
+    return rects
 
 # ============== BUTTON PAGE FUNCTIONS ==============
 def get_btn_rect(idx):
@@ -2275,97 +2368,6 @@ def is_animated_ext(path):
     lower = path.lower()
     return lower.endswith('.gif') or lower.endswith('.webp')
 
-def load_gif_frames(path, size, use_cover=False):
-    if not path or not is_animated_ext(path):
-        return None
-    pi_path = os.path.join(ICONS_DIR, os.path.basename(path.replace('\\\\', '/')))
-    try:
-        img = Image.open(pi_path)
-        frames = []
-        for frame_num in range(getattr(img, 'n_frames', 1)):
-            img.seek(frame_num)
-            frame = img.convert("RGBA")
-            if use_cover:
-                frame = cover_resize(frame, size[0], size[1])
-            else:
-                frame = frame.resize(size, Image.LANCZOS)
-            frames.append(frame)
-        return frames if frames else None
-    except:
-        return None
-
-def cover_resize(img, target_w, target_h):
-    img_w, img_h = img.size
-    img_ratio = img_w / img_h
-    target_ratio = target_w / target_h
-    if img_ratio > target_ratio:
-        new_h = target_h
-        new_w = int(new_h * img_ratio)
-    else:
-        new_w = target_w
-        new_h = int(new_w / img_ratio)
-    img = img.resize((new_w, new_h), Image.LANCZOS)
-    left = (new_w - target_w) // 2
-    top = (new_h - target_h) // 2
-    return img.crop((left, top, left + target_w, top + target_h))
-
-def load_image(path, size, frame_idx=0, use_cover=False):
-    if not path:
-        return None
-    pi_path = os.path.join(ICONS_DIR, os.path.basename(path.replace('\\\\', '/')))
-    if is_animated_ext(path):
-        cache_key = (pi_path, size, use_cover)
-        if cache_key not in gif_cache:
-            frames = load_gif_frames(path, size, use_cover)
-            if frames:
-                gif_cache[cache_key] = frames
-        if cache_key in gif_cache:
-            frames = gif_cache[cache_key]
-            return frames[frame_idx % len(frames)]
-    try:
-        img = Image.open(pi_path).convert("RGBA")
-        return cover_resize(img, size[0], size[1]) if use_cover else img.resize(size, Image.LANCZOS)
-    except:
-        return None
-
-def make_button_frame_bytes(page_idx, highlight=-1):
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img)
-    buttons = BUTTON_PAGES[page_idx]["buttons"]
-    for i, btn in enumerate(buttons):
-        x1, y1, x2, y2 = get_btn_rect(i)
-        color = tuple(btn.get("color", [60, 60, 80]))
-        if i == highlight:
-            color = (255, 255, 255)
-        draw.rounded_rectangle([x1, y1, x2, y2], radius=12, fill=color, outline=CYBER_ORANGE, width=2)
-        if i != highlight:
-            bg_frame = gif_frame_indices.get(f"bg_{{page_idx}}_{{i}}", 0)
-            bg_img = load_image(btn.get("background"), (BTN_W - 4, BTN_H - 4), bg_frame, use_cover=True)
-            if bg_img:
-                img.paste(bg_img, (x1 + 2, y1 + 2), bg_img)
-            icon_frame = gif_frame_indices.get(f"icon_{{page_idx}}_{{i}}", 0)
-            icon = load_image(btn.get("icon"), (50, 50), icon_frame)
-            if icon:
-                img.paste(icon, (x1 + (BTN_W - 50) // 2, y1 + 10), icon)
-        label = btn.get("label", "")
-        if label:
-            bbox = draw.textbbox((0, 0), label, font=font_btn)
-            tw = bbox[2] - bbox[0]
-            draw.text((x1 + (BTN_W - tw) // 2, y2 - 25), label, fill=CYBER_BRIGHT, font=font_btn)
-    draw_nav_bar(draw, NUM_DASHBOARD_PAGES + page_idx)
-    arr = np.array(img, dtype=np.uint16)
-    rgb565 = ((arr[:,:,0] >> 3) << 11) | ((arr[:,:,1] >> 2) << 5) | (arr[:,:,2] >> 3)
-    return rgb565.astype(np.uint16).tobytes()
-
-def has_animated():
-    for page in BUTTON_PAGES:
-        for btn in page["buttons"]:
-            if is_animated_ext(btn.get("background", "")) or is_animated_ext(btn.get("icon", "")):
-                return True
-    return False
-
-HAS_GIFS = has_animated()
-
 gif_buttons_per_page = {{}}
 for p_idx, page in enumerate(BUTTON_PAGES):
     gif_buttons_per_page[p_idx] = []
@@ -2374,77 +2376,151 @@ for p_idx, page in enumerate(BUTTON_PAGES):
             gif_buttons_per_page[p_idx].append(b_idx)
             gif_frame_indices[f"btn_{{p_idx}}_{{b_idx}}"] = 0
 
-print("Pre-rendering button pages...")
-frame_cache = {{}}
-for p in range(len(BUTTON_PAGES)):
-    frame_cache[(p, -1)] = make_button_frame_bytes(p, -1)
-    for i in range(len(BUTTON_PAGES[p]["buttons"])):
-        frame_cache[(p, i)] = make_button_frame_bytes(p, i)
-print(f"Cached {{len(frame_cache)}} button frames!")
-
-print("Pre-rendering GIF frames...")
-gif_frame_cache = {{}}
-for p_idx, page in enumerate(BUTTON_PAGES):
-    for b_idx in gif_buttons_per_page.get(p_idx, []):
-        btn = page["buttons"][b_idx]
-        bg_frames = load_gif_frames(btn.get("background"), (BTN_W - 4, BTN_H - 4), use_cover=True)
-        icon_frames = load_gif_frames(btn.get("icon"), (50, 50))
-        num_frames = max(len(bg_frames) if bg_frames else 1, len(icon_frames) if icon_frames else 1)
-        for f_idx in range(num_frames):
-            btn_img = Image.new("RGB", (BTN_W, BTN_H), tuple(btn.get("color", [60, 60, 80])))
-            draw = ImageDraw.Draw(btn_img)
-            draw.rounded_rectangle([0, 0, BTN_W-1, BTN_H-1], radius=12, outline=CYBER_ORANGE, width=2)
-            if bg_frames:
-                btn_img.paste(bg_frames[f_idx % len(bg_frames)], (2, 2), bg_frames[f_idx % len(bg_frames)])
-            if icon_frames:
-                btn_img.paste(icon_frames[f_idx % len(icon_frames)], ((BTN_W - 50) // 2, 10), icon_frames[f_idx % len(icon_frames)])
-            label = btn.get("label", "")
-            if label:
-                bbox = draw.textbbox((0, 0), label, font=font_btn)
-                draw.text(((BTN_W - bbox[2] + bbox[0]) // 2, BTN_H - 25), label, fill=CYBER_BRIGHT, font=font_btn)
-            arr = np.array(btn_img, dtype=np.uint16)
-            rgb565 = ((arr[:,:,0] >> 3) << 11) | ((arr[:,:,1] >> 2) << 5) | (arr[:,:,2] >> 3)
-            gif_frame_cache[(p_idx, b_idx, f_idx)] = rgb565.astype(np.uint16).tobytes()
-        gif_frame_indices[f"btn_{{p_idx}}_{{b_idx}}_max"] = num_frames
-
-print(f"Pre-rendered {{len(gif_frame_cache)}} GIF frames!")
-
-def show_button_page(page_idx, highlight=-1):
-    fb_mmap.seek(0)
-    fb_mmap.write(frame_cache[(page_idx, highlight)])
+print("Mapping frame atlas...")
+atlas = streamdeck_pack.load_or_build_pack(PACK_FILE, BUTTON_PAGES, NUM_DASHBOARD_PAGES, ICONS_DIR)
+for (p_idx, b_idx), num_frames in atlas.gif_frame_counts.items():
+    gif_frame_indices[f"btn_{{p_idx}}_{{b_idx}}_max"] = num_frames
+print(f"Mapped {{len(atlas)}} frames!")
+
+def blit(x, y, arr):
+    h, w = arr.shape
+    fb_array[y:y + h, x:x + w] = arr
+    fb.mark(x, y, x + w, y + h)
+
+# (page, button) -> GIF frame index currently on the framebuffer
+gif_shown = {{}}
+
+def show_button_page(page_idx):
+    streamdeck_widgets.release_screen()
+    gif_shown.clear()
+    fb_array[:, :] = atlas.page_array(page_idx)
+    fb.mark_all()
+    start_gif_page(page_idx)
+
+def show_button_rect(page_idx, btn_idx, highlight=False):
+    """Copy one button's rectangle: its highlight patch, or the page frame to restore it"""
+    x1, y1, x2, y2 = get_btn_rect(btn_idx)
+    gif_shown.pop((page_idx, btn_idx), None)
+    if highlight:
+        fb_array[y1:y2 + 1, x1:x2 + 1] = atlas.highlight_array(page_idx, btn_idx)
+    else:
+        fb_array[y1:y2 + 1, x1:x2 + 1] = atlas.page_array(page_idx)[y1:y2 + 1, x1:x2 + 1]
+    fb.mark(x1, y1, x2 + 1, y2 + 1)
 
 def render_button_to_fb(page_idx, btn_idx):
+    """Write only the rectangle that changed since the frame on screen; restart from the keyframe otherwise"""
     x1, y1, x2, y2 = get_btn_rect(btn_idx)
-    frame_idx = gif_frame_indices.get(f"btn_{{page_idx}}_{{btn_idx}}", 0)
-    max_frames = gif_frame_indices.get(f"btn_{{page_idx}}_{{btn_idx}}_max", 1)
-    btn_bytes = gif_frame_cache.get((page_idx, btn_idx, frame_idx % max_frames))
-    if not btn_bytes:
+    key = f"btn_{{page_idx}}_{{btn_idx}}"
+    max_frames = gif_frame_indices.get(key + "_max", 1)
+    frame_idx = gif_frame_indices.get(key, 0) % max_frames
+    shown = gif_shown.get((page_idx, btn_idx))
+    if shown == frame_idx:
         return
-    for row in range(BTN_H):
-        offset = ((y1 + row) * WIDTH + x1) * 2
-        row_start = row * BTN_W * 2
-        fb_mmap[offset:offset + BTN_W * 2] = btn_bytes[row_start:row_start + BTN_W * 2]
-
-def update_gif_buttons(page_idx):
+    if shown is not None and frame_idx == (shown + 1) % max_frames:
+        delta = atlas.gif_delta(page_idx, btn_idx, frame_idx)
+        if delta:
+            dx, dy, arr = delta
+            blit(x1 + dx, y1 + dy, arr)
+    else:
+        frame = atlas.gif_array(page_idx, btn_idx)
+        if frame is None:
+            return
+        blit(x1, y1, frame)
+        frame_idx = 0
+        gif_frame_indices[key] = 0
+    gif_shown[(page_idx, btn_idx)] = frame_idx
+
+# ============== GIF SCHEDULER ==============
+# One loop timer per animated button on the visible page
+loop = streamdeck_loop.EventLoop()
+gif_timers = {{}}  # (page_idx, btn_idx) -> loop timer
+
+def schedule_gif(page_idx, btn_idx, deadline):
+    stop_gif(page_idx, btn_idx)
+    gif_timers[(page_idx, btn_idx)] = loop.call_at(deadline, lambda: gif_tick(page_idx, btn_idx, deadline), "gif")
+
+def stop_gif(page_idx, btn_idx):
+    timer = gif_timers.pop((page_idx, btn_idx), None)
+    if timer:
+        timer.cancel()
+
+def stop_gifs():
+    for timer in gif_timers.values():
+        timer.cancel()
+    gif_timers.clear()
+
+def start_gif_page(page_idx):
+    """Drop timers of other pages; this page's GIFs start from their keyframe now"""
+    stop_gifs()
+    now = time.monotonic()
     for btn_idx in gif_buttons_per_page.get(page_idx, []):
-        render_button_to_fb(page_idx, btn_idx)
-
-def advance_gif_frames():
-    for key in gif_frame_indices:
-        if not key.endswith("_max"):
-            gif_frame_indices[key] += 1
+        gif_frame_indices[f"btn_{{page_idx}}_{{btn_idx}}"] = 0
+        schedule_gif(page_idx, btn_idx, now)
+
+def gif_tick(page_idx, btn_idx, deadline):
+    """Show the button's next frame and reschedule it by that frame's GIF duration"""
+    key = f"btn_{{page_idx}}_{{btn_idx}}"
+    render_button_to_fb(page_idx, btn_idx)
+    durations = atlas.gif_durations(page_idx, btn_idx)
+    frame_idx = gif_frame_indices.get(key, 0) % len(durations)
+    gif_frame_indices[key] = frame_idx + 1
+    next_deadline = deadline + durations[frame_idx]
+    now = time.monotonic()
+    if next_deadline <= now:
+        # Running late: don't burst through the missed frames
+        next_deadline = now + durations[frame_idx]
+    schedule_gif(page_idx, btn_idx, next_deadline)
+
+# Presses are only queued here; a worker thread talks to the agent
+actions = streamdeck_fetch.ActionDispatcher()
+actions.start()
 
 def send_action(action, app_path=None):
     if not action:
         return
-    try:
-        if action == "custom_app" and app_path:
-            from urllib.parse import quote
-            requests.get(f"http://{{WINDOWS_PC_IP}}:{{WINDOWS_PORT}}/launch?path={{quote(app_path, safe='')}}", timeout=0.5)
-        else:
-            requests.get(f"http://{{WINDOWS_PC_IP}}:{{WINDOWS_PORT}}/action/{{action}}", timeout=0.3)
-    except:
-        pass
+    base = f"http://{{WINDOWS_PC_IP}}:{{WINDOWS_PORT}}"
+    if action == "custom_app" and app_path:
+        from urllib.parse import quote
+        actions.submit(action, f"{{base}}/launch?path={{quote(app_path, safe='')}}")
+    else:
+        actions.submit(action, f"{{base}}/action/{{action}}")
+
+# ============== BACKGROUND FETCHERS ==============
+fetchers = {{}}  # page type -> Fetcher thread filling `store`
+
+def visible_source():
+    if page_selector_active or current_page >= NUM_DASHBOARD_PAGES:
+        return None
+    return DASHBOARD_TYPES[current_page]
+
+def refresh_source(source):
+    """The visible page picks new data up on its next repaint tick; neighbours get re-warmed"""
+    if idle_since is None and source in prefetch_sources():
+        schedule_warm()
+
+def data_arrived(source):
+    """Called on a fetcher thread; the repaint happens on the loop thread"""
+    loop.call_soon_threadsafe(lambda: refresh_source(source))
+
+# Agent WebSocket topics feeding each source (snapshot, then field deltas); their HTTP
+# fetchers poll only while it's down. Per-core load and the fan list aren't drawn, so not subscribed
+WS_TOPICS = {{"cpu": "windows_pc", "gpu": "windows_pc", "memory": "windows_pc", "disk": "windows_pc", "network": "windows_pc",
+             "system": "windows_pc", "docker": "docker"}}
+stream = streamdeck_fetch.StreamSubscriber(
+    store, f"ws://{{WINDOWS_PC_IP}}:{{WINDOWS_WS_PORT}}",
+    {{key: source for key, source in WS_TOPICS.items() if source in DASHBOARD_TYPES}}, on_update=data_arrived)
+
+def stream_connected():
+    return stream.connected
+
+for source in set(DASHBOARD_TYPES):
+    if source in DATA_SOURCES:
+        fetch, interval = DATA_SOURCES[source]
+        skip = stream_connected if source in stream.topics.values() else None
+        fetchers[source] = streamdeck_fetch.Fetcher(store, source, fetch, interval, on_update=data_arrived, skip=skip)
+        fetchers[source].start()
+if stream.topics:
+    stream.start()
 
 # ============== MAIN LOOP ==============
 def touch_to_screen(tx, ty):
@@ -2454,94 +2530,315 @@ def touch_to_screen(tx, ty):
         sy = HEIGHT - sy
     return max(0, min(WIDTH-1, sx)), max(0, min(HEIGHT-1, sy))
 
-def render_current_page():
+def render_page(page):
 {dispatch_code}
 
+def render_current_page():
+    if current_page < NUM_DASHBOARD_PAGES:
+        painted[current_page] = paint_state(current_page)
+    render_page(current_page)
+
+print("Rendering dashboard chrome...")
+for page_num, page_type in enumerate(DASHBOARD_TYPES):
+    for name, builder in DASHBOARD_BUILDERS.get(page_type, []):
+        get_dashboard(name, page_num, builder)
+
 print("Ready!")
-render_current_page()
 touch = InputDevice(TOUCH_DEV)
 
 touch_x, touch_y = 0, 0
 touching = False
 pending_touch = False
 page_selector_active = False
-last_gif_update = time.time()
-last_dashboard_update = time.time()
-GIF_INTERVAL = 0.06
-DASHBOARD_INTERVAL = 1.0
-
-while True:
+dashboard_timer = None
+STATS_INTERVAL = 300
+IDLE_TIMEOUT = {idle_timeout}  # seconds without a touch before the display sleeps, 0 = never
+
+# Repaints run on each dashboard's own refresh_interval, apart from the
+# fetchers' data cadence, and are skipped while nothing they'd show changed
+painted = {{}}  # dashboard page -> paint_state() of its last paint
+repaints = 0
+repaints_skipped = 0
+
+def paint_state(page):
+    source = DASHBOARD_TYPES[page]
+    return (store.version(source), stale_text(source), data_offline(source))
+
+def repaint_dashboard():
+    global repaints, repaints_skipped
+    if painted.get(current_page) == paint_state(current_page):
+        repaints_skipped += 1
+        return
+    repaints += 1
+    render_current_page()
+
+def show_page():
+    """Draw the current page (or the page selector) and arm only the timers it needs"""
+    global dashboard_timer
+    if dashboard_timer:
+        dashboard_timer.cancel()
+        dashboard_timer = None
+    source = visible_source()
+    prefetch = prefetch_sources()
+    for name, fetcher in fetchers.items():
+        fetcher.set_active(name == source or name in prefetch)
+    if page_selector_active:
+        stop_gifs()
+        render_page_selector()
+        schedule_warm(restart=True)
+        return
     if current_page < NUM_DASHBOARD_PAGES:
-        timeout = 0.5
-    elif HAS_GIFS:
-        timeout = 0.03
+        stop_gifs()
+        dashboard_timer = loop.call_every(DASHBOARD_REFRESH[current_page], repaint_dashboard, "repaint")
+    render_current_page()
+    schedule_warm(restart=True)
+
+def release_button(page_idx, btn_idx):
+    """End of the press highlight, unless the page changed meanwhile"""
+    if page_selector_active or current_page != NUM_DASHBOARD_PAGES + page_idx:
+        return
+    show_button_rect(page_idx, btn_idx)
+    if btn_idx in gif_buttons_per_page.get(page_idx, []):
+        schedule_gif(page_idx, btn_idx, time.monotonic())
+
+def print_stats():
+    global warm_count, warm_time, repaints, repaints_skipped
+    global idle_entries, idle_total, wake_count, wake_total, wake_worst
+    print(f"Text cache: {{streamdeck_widgets.text_cache.stats()}}")
+    print(f"Timer lateness: {{loop.stats()}}")
+    print(f"Present: {{fb.stats()}}")
+    print(f"Actions: {{actions.stats()}}")
+    avg = 1000 * warm_time / warm_count if warm_count else 0.0
+    print(f"Prefetch: {{warm_count}} page warms, avg {{avg:.1f}} ms")
+    print(f"Dashboard repaints: {{repaints}} painted, {{repaints_skipped}} skipped unchanged")
+    print(f"Idle: {{idle_stats()}}")
+    print(f"Pi metrics: {{pi_metrics.stats()}}")
+    print(f"Agent stream: {{stream.stats()}}")
+    loop.reset_stats()
+    fb.reset_stats()
+    warm_count, warm_time = 0, 0.0
+    repaints, repaints_skipped = 0, 0
+    idle_entries, idle_total = 0, 0.0
+    wake_count, wake_total, wake_worst = 0, 0.0, 0.0
+
+# ============== NEIGHBOUR PREFETCH ==============
+# While idle, the pages a tap is likely to open next (N-1, N+1 and the last
+# one picked in the selector) are warmed: their fetchers poll at full rate,
+# dashboards pre-composite off screen from the store and button pages fault
+# their frames in, so navigating to them is a single framebuffer copy.
+WARM_DELAY = 0.2  # after a page change or new neighbour data
+last_selected_page = None
+warm_timer = None
+warm_count = 0
+warm_time = 0.0
+
+def neighbour_pages():
+    pages = dict.fromkeys([current_page - 1, current_page + 1, last_selected_page])
+    return [p for p in pages if p is not None and 0 <= p < TOTAL_PAGES and p != current_page]
+
+def prefetch_sources():
+    return {{DASHBOARD_TYPES[p] for p in neighbour_pages() if p < NUM_DASHBOARD_PAGES}}
+
+def warm_page(page):
+    global warming
+    if page >= NUM_DASHBOARD_PAGES:
+        atlas.warm_page(page - NUM_DASHBOARD_PAGES)
+        return
+    warming = True
+    try:
+        render_page(page)
+    finally:
+        warming = False
+
+def warm_neighbours():
+    global warm_timer, warm_count, warm_time
+    warm_timer = None
+    for page in neighbour_pages():
+        started = time.perf_counter()
+        warm_page(page)
+        warm_count += 1
+        warm_time += time.perf_counter() - started
+
+def schedule_warm(restart=False):
+    global warm_timer
+    if warm_timer and restart:
+        warm_timer.cancel()
+        warm_timer = None
+    if warm_timer is None:
+        warm_timer = loop.call_later(WARM_DELAY, warm_neighbours, "warm")
+
+# ============== IDLE POWER MODE ==============
+# After IDLE_TIMEOUT seconds without a touch the deck goes dark: display
+# off, fetchers and the agent stream paused, no repaint/GIF/warm/stats
+# timers, so the loop blocks on the touch fd alone. The waking touch only
+# wakes: the last frame is still in the framebuffer and shows as soon as
+# the display is on, then the page is redrawn and fetching resumes.
+last_touch = time.monotonic()
+idle_since = None
+idle_timer = None
+stats_timer = None
+idle_entries = 0
+idle_total = 0.0
+wake_count = 0
+wake_total = 0.0
+wake_worst = 0.0
+
+def arm_idle_timer():
+    global idle_timer
+    if IDLE_TIMEOUT > 0:
+        idle_timer = loop.call_at(last_touch + IDLE_TIMEOUT, check_idle, "idle")
+
+def check_idle():
+    global idle_timer
+    idle_timer = None
+    if time.monotonic() - last_touch >= IDLE_TIMEOUT:
+        go_idle()
     else:
-        timeout = None
-
-    r, w, x = select.select([touch.fd], [], [], timeout)
-
-    if not page_selector_active:
-        if current_page < NUM_DASHBOARD_PAGES and time.time() - last_dashboard_update > DASHBOARD_INTERVAL:
-            render_current_page()
-            last_dashboard_update = time.time()
-        if current_page >= NUM_DASHBOARD_PAGES and HAS_GIFS and time.time() - last_gif_update > GIF_INTERVAL:
-            advance_gif_frames()
-            update_gif_buttons(current_page - NUM_DASHBOARD_PAGES)
-            last_gif_update = time.time()
-
-    if r:
-        for event in touch.read():
-            if event.type == ecodes.EV_ABS:
-                if event.code == ecodes.ABS_X:
-                    touch_x = event.value
-                elif event.code == ecodes.ABS_Y:
-                    touch_y = event.value
-            elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
-                if event.value == 1:
-                    pending_touch = True
-                    touching = True
-                else:
-                    touching = False
-            elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
-                if pending_touch and touching:
-                    pending_touch = False
-                    sx, sy = touch_to_screen(touch_x, touch_y)
-
-                    if page_selector_active:
-                        selected = get_page_from_grid(sx, sy)
-                        if selected >= 0:
-                            current_page = selected
-                        page_selector_active = False
-                        render_current_page()
-                        continue
-
-                    if sx >= RIGHT_NAV[0] and sy >= NAV_Y:
-                        if current_page < TOTAL_PAGES - 1:
-                            current_page += 1
-                            render_current_page()
-                        continue
-
-                    if sx <= LEFT_NAV[2] and sy >= NAV_Y:
-                        if current_page > 0:
-                            current_page -= 1
-                            render_current_page()
-                        continue
-
-                    if LEFT_NAV[2] < sx < RIGHT_NAV[0] and sy >= NAV_Y:
-                        page_selector_active = True
-                        render_page_selector()
-                        continue
-
-                    if current_page >= NUM_DASHBOARD_PAGES:
-                        btn_page_idx = current_page - NUM_DASHBOARD_PAGES
-                        for i, btn in enumerate(BUTTON_PAGES[btn_page_idx]["buttons"]):
-                            x1, y1, x2, y2 = get_btn_rect(i)
-                            if x1 <= sx <= x2 and y1 <= sy <= y2:
-                                show_button_page(btn_page_idx, i)
-                                send_action(btn.get("action"), btn.get("app_path"))
-                                time.sleep(0.05)
-                                show_button_page(btn_page_idx)
-                                break
+        arm_idle_timer()  # touched since it was armed
+
+def go_idle():
+    global idle_since, idle_entries, dashboard_timer, warm_timer, stats_timer
+    idle_since = time.monotonic()
+    idle_entries += 1
+    for timer in (dashboard_timer, warm_timer, stats_timer):
+        if timer:
+            timer.cancel()
+    dashboard_timer = warm_timer = stats_timer = None
+    stop_gifs()
+    for fetcher in fetchers.values():
+        fetcher.set_paused(True)
+    stream.set_paused(True)
+    if not fb.set_power(False):
+        print("No backlight control, display stays on while idle")
+
+def wake_up(started):
+    global idle_since, idle_total, wake_count, wake_total, wake_worst, stats_timer
+    idle_total += started - idle_since
+    # Paused fetchers weren't failing: data doesn't age (or go offline) while the deck slept
+    store.exclude(started - idle_since)
+    idle_since = None
+    fb.set_power(True)
+    for fetcher in fetchers.values():
+        fetcher.set_paused(False)
+    stream.set_paused(False)
+    show_page()
+    fb.present()
+    latency = time.monotonic() - started
+    wake_count += 1
+    wake_total += latency
+    wake_worst = max(wake_worst, latency)
+    stats_timer = loop.call_every(STATS_INTERVAL, print_stats, "stats")
+    arm_idle_timer()
+
+def idle_stats():
+    idle = idle_total + (time.monotonic() - idle_since if idle_since is not None else 0.0)
+    text = f"{{idle_entries}}x, {{idle / 60:.1f}} min total"
+    if wake_count:
+        text += f", wake avg {{1000 * wake_total / wake_count:.1f}} ms worst {{1000 * wake_worst:.1f}} ms"
+    return text
+
+# ============== TOUCH HIT MAPS ==============
+# Every screen gets a HEIGHT x WIDTH uint8 map of region ids, painted once
+# from its layout, and a table from region id to handler: a touch is one
+# array index plus one dict lookup however many buttons the page has.
+REGION_NONE, REGION_PREV, REGION_SELECTOR, REGION_NEXT = 0, 1, 2, 3
+REGION_ITEM = 8  # + button / selector card index, up to 255
+
+def build_hit_map(item_rects=(), nav=True):
+    hit_map = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+    for i, (x1, y1, x2, y2) in enumerate(item_rects):
+        hit_map[y1:y2 + 1, x1:x2 + 1] = REGION_ITEM + i
+    if nav:  # the nav bar wins over anything under it
+        hit_map[NAV_Y:, :LEFT_NAV[2] + 1] = REGION_PREV
+        hit_map[NAV_Y:, LEFT_NAV[2] + 1:RIGHT_NAV[0]] = REGION_SELECTOR
+        hit_map[NAV_Y:, RIGHT_NAV[0]:] = REGION_NEXT
+    return hit_map
+
+def go_to_page(page):
+    global current_page
+    if 0 <= page < TOTAL_PAGES:
+        current_page = page
+        show_page()
+
+def open_page_selector():
+    global page_selector_active
+    page_selector_active = True
+    show_page()
+
+def close_page_selector(page=None):
+    global current_page, page_selector_active, last_selected_page
+    if page is not None:
+        current_page = last_selected_page = page
+    page_selector_active = False
+    show_page()
+
+def press_button(page_idx, btn_idx):
+    btn = BUTTON_PAGES[page_idx]["buttons"][btn_idx]
+    stop_gif(page_idx, btn_idx)
+    show_button_rect(page_idx, btn_idx, highlight=True)
+    send_action(btn.get("action"), btn.get("app_path"))
+    loop.call_later(0.05, lambda: release_button(page_idx, btn_idx), "release")
+
+nav_handlers = {{
+    REGION_PREV: lambda: go_to_page(current_page - 1),
+    REGION_SELECTOR: open_page_selector,
+    REGION_NEXT: lambda: go_to_page(current_page + 1),
+}}
+# Dashboards have no touch targets of their own, so they share one map
+dashboard_screen = (build_hit_map(), nav_handlers)
+button_screens = []
+for page_idx, page in enumerate(BUTTON_PAGES):
+    handlers = dict(nav_handlers)
+    for i in range(len(page["buttons"])):
+        handlers[REGION_ITEM + i] = lambda p=page_idx, b=i: press_button(p, b)
+    button_screens.append((build_hit_map([get_btn_rect(i) for i in range(len(page["buttons"]))]), handlers))
+# Any tap on the selector closes it; one on a card also switches page
+selector_rects = page_grid_rects()
+selector_handlers = {{REGION_NONE: close_page_selector}}
+for i in range(len(selector_rects)):
+    selector_handlers[REGION_ITEM + i] = lambda p=i: close_page_selector(p)
+selector_screen = (build_hit_map(selector_rects, nav=False), selector_handlers)
+
+def current_screen():
+    if page_selector_active:
+        return selector_screen
+    if current_page < NUM_DASHBOARD_PAGES:
+        return dashboard_screen
+    return button_screens[current_page - NUM_DASHBOARD_PAGES]
+
+def handle_touch():
+    global touch_x, touch_y, touching, pending_touch, last_touch
+    for event in touch.read():
+        if event.type == ecodes.EV_ABS:
+            if event.code == ecodes.ABS_X:
+                touch_x = event.value
+            elif event.code == ecodes.ABS_Y:
+                touch_y = event.value
+        elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_TOUCH:
+            if event.value == 1:
+                pending_touch = True
+                touching = True
+            else:
+                touching = False
+        elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT:
+            if pending_touch and touching:
+                pending_touch = False
+                last_touch = time.monotonic()
+                if idle_since is not None:
+                    wake_up(last_touch)
+                    continue
+                sx, sy = touch_to_screen(touch_x, touch_y)
+                hit_map, handlers = current_screen()
+                handler = handlers.get(int(hit_map[sy, sx]))
+                if handler:
+                    handler()
+
+show_page()
+loop.call_before_wait(fb.present)
+loop.add_reader(touch.fd, handle_touch)
+stats_timer = loop.call_every(STATS_INTERVAL, print_stats, "stats")
+arm_idle_timer()
+loop.run_forever()
 '''
         return script
 
@@ -2586,6 +2883,24 @@ while True:
                             remote_path = f"{PI_ICONS_DIR}/{rel_root}/{filename}".replace("\\", "/")
                         sftp.put(local_path, remote_path)
 
+            # Pre-render button pages and GIF frames here so the Pi starts instantly
+            pack_data = streamdeck_pack.build_pack(self.get_button_pages(), len(self.get_dashboard_pages()), LOCAL_ICONS_DIR)
+            sftp.put(streamdeck_pack.__file__, PI_PACK_MODULE)
+            sftp.put(streamdeck_widgets.__file__, PI_WIDGETS_MODULE)
+            sftp.put(streamdeck_loop.__file__, PI_LOOP_MODULE)
+            sftp.put(streamdeck_fetch.__file__, PI_FETCH_MODULE)
+            sftp.put(streamdeck_fb.__file__, PI_FB_MODULE)
+            sftp.put(streamdeck_metrics.__file__, PI_METRICS_MODULE)
+            try:
+                sftp.mkdir(PI_FONTS_DIR)
+            except:
+                pass
+            sftp.put(streamdeck_pack.find_font(), f"{PI_FONTS_DIR}/{streamdeck_pack.FONT_NAME}")
+            # The running script has the old pack mmapped: write beside it and rename over it
+            with sftp.file(PI_PACK + ".tmp", 'wb') as f:
+                f.write(pack_data)
+            sftp.posix_rename(PI_PACK + ".tmp", PI_PACK)
+
             # Upload script
             script = self.generate_pi_script()
             with sftp.file(PI_SCRIPT, 'w') as f:
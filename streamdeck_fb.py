@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Double-Buffered Framebuffer
+Everything on the Pi draws into an off-screen RGB565 back buffer and marks
+the rectangles it touched. present() (run by the event loop before it
+sleeps) pushes the damage to the panel in one go, so a half-drawn frame is
+never visible. Damage is kept per row and copied as row spans: runs of
+consecutive rows with the same changed column range become one 2-D copy.
+
+If the driver gives (or accepts) a virtual height of 2x the screen, the
+two halves are used as pages: present() writes the hidden page and flips
+to it with FBIOPAN_DISPLAY. Otherwise (e.g. fbtft SPI panels) the spans
+are copied straight into the single mapped page.
+
+present() also records how long each present took and how many pixels
+it copied, for frame pacing stats.
+
+set_power() turns the panel off and on for idle mode: through the sysfs
+backlight (bl_power) when the panel has one, else FBIOBLANK. Both pages
+keep their contents, so the last frame is back the moment it's on again.
+
+Used by the generated Pi script.
+
+Requirements: pip install numpy
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+FBIOGET_VSCREENINFO = 0x4600
+FBIOPUT_VSCREENINFO = 0x4601
+FBIOPAN_DISPLAY = 0x4606
+FBIOBLANK = 0x4611
+FB_BLANK_UNBLANK, FB_BLANK_POWERDOWN = 0, 4
+BACKLIGHT_DIR = "/sys/class/backlight"
+VSCREENINFO_SIZE = 160  # struct fb_var_screeninfo: 40 u32
+# u32 indexes into fb_var_screeninfo
+VI_YRES, VI_YRES_VIRTUAL, VI_YOFFSET = 1, 3, 5
+
+def find_backlight():
+    """Writable bl_power of the first sysfs backlight device, None if there is none"""
+    try:
+        names = sorted(os.listdir(BACKLIGHT_DIR))
+    except OSError:
+        return None
+    for name in names:
+        path = os.path.join(BACKLIGHT_DIR, name, "bl_power")
+        if os.access(path, os.W_OK):
+            return path
+    return None
+
+class Framebuffer:
+    def __init__(self, path, width, height):
+        self.width, self.height = width, height
+        self.frame_bytes = width * height * 2
+        self.fd = os.open(path, os.O_RDWR)
+        self.back = np.zeros((height, width), dtype=np.uint16)
+        # Damaged column range per row, empty while x2 <= x1
+        self.row_x1 = np.full(height, width, dtype=np.int32)
+        self.row_x2 = np.zeros(height, dtype=np.int32)
+        self.pending = False
+        self.pages = self.open_pages()
+        self.backlight = find_backlight()
+        self.shown = 0
+        # The second page starts out unsynced
+        self.prev_spans = [(0, height, 0, width)] if self.flipping else []
+        self.front = self.pages[0]
+        self.back[:, :] = self.front
+        self.presents = 0
+        self.pixels = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    @property
+    def flipping(self):
+        return len(self.pages) == 2
+
+    def open_pages(self):
+        """Two panning pages if the driver allows a 2x virtual height, else one mapped page"""
+        try:
+            info = bytearray(VSCREENINFO_SIZE)
+            fcntl.ioctl(self.fd, FBIOGET_VSCREENINFO, info)
+            fields = list(struct.unpack("40I", info))
+            if fields[VI_YRES_VIRTUAL] < 2 * fields[VI_YRES]:
+                fields[VI_YRES_VIRTUAL] = 2 * fields[VI_YRES]
+                fcntl.ioctl(self.fd, FBIOPUT_VSCREENINFO, bytearray(struct.pack("40I", *fields)))
+                fcntl.ioctl(self.fd, FBIOGET_VSCREENINFO, info)
+                fields = list(struct.unpack("40I", info))
+            if fields[VI_YRES_VIRTUAL] < 2 * self.height:
+                raise OSError("no virtual height for a second page")
+            self.vinfo = fields
+            self.mmap = mmap.mmap(self.fd, 2 * self.frame_bytes)
+            self.pan(0)
+            whole = np.frombuffer(self.mmap, dtype=np.uint16).reshape(2 * self.height, self.width)
+            return [whole[:self.height], whole[self.height:]]
+        except:
+            self.mmap = mmap.mmap(self.fd, self.frame_bytes)
+            return [np.frombuffer(self.mmap, dtype=np.uint16).reshape(self.height, self.width)]
+
+    def pan(self, page):
+        self.vinfo[VI_YOFFSET] = page * self.height
+        fcntl.ioctl(self.fd, FBIOPAN_DISPLAY, bytearray(struct.pack("40I", *self.vinfo)))
+
+    def set_power(self, on):
+        """Display on/off; returns False if neither the backlight nor blanking is supported"""
+        try:
+            if self.backlight:
+                with open(self.backlight, "w") as f:
+                    f.write("0" if on else "4")
+            else:
+                fcntl.ioctl(self.fd, FBIOBLANK, FB_BLANK_UNBLANK if on else FB_BLANK_POWERDOWN)
+            return True
+        except OSError:
+            return False
+
+    def mark(self, x1, y1, x2, y2):
+        """Damage an exclusive rectangle of the back buffer"""
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if x2 <= x1 or y2 <= y1:
+            return
+        np.minimum(self.row_x1[y1:y2], x1, out=self.row_x1[y1:y2])
+        np.maximum(self.row_x2[y1:y2], x2, out=self.row_x2[y1:y2])
+        self.pending = True
+
+    def mark_all(self):
+        self.mark(0, 0, self.width, self.height)
+
+    def take_spans(self):
+        """Damage as (y1, y2, x1, x2) blocks of rows sharing a column range; clears it"""
+        rows = np.flatnonzero(self.row_x2 > self.row_x1)
+        x1, x2 = self.row_x1[rows], self.row_x2[rows]
+        breaks = np.flatnonzero((np.diff(rows) != 1) | (np.diff(x1) != 0) | (np.diff(x2) != 0)) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(rows)]))
+        self.row_x1[:] = self.width
+        self.row_x2[:] = 0
+        self.pending = False
+        return [(int(rows[s]), int(rows[e - 1]) + 1, int(x1[s]), int(x2[s])) for s, e in zip(starts, ends)]
+
+    def present(self):
+        """Push the damaged spans to the screen; returns the number of pixels copied"""
+        if not self.pending:
+            return 0
+        started = time.perf_counter()
+        spans = self.take_spans()
+        if self.flipping:
+            # The hidden page also misses what the previous present put on the other one
+            hidden = 1 - self.shown
+            page = self.pages[hidden]
+            for y1, y2, x1, x2 in self.prev_spans + spans:
+                page[y1:y2, x1:x2] = self.back[y1:y2, x1:x2]
+            self.pan(hidden)
+            self.shown = hidden
+            self.front = page
+            self.prev_spans = spans
+        else:
+            for y1, y2, x1, x2 in spans:
+                self.front[y1:y2, x1:x2] = self.back[y1:y2, x1:x2]
+        pixels = sum((y2 - y1) * (x2 - x1) for y1, y2, x1, x2 in spans)
+        elapsed = time.perf_counter() - started
+        self.presents += 1
+        self.pixels += pixels
+        self.total += elapsed
+        self.worst = max(self.worst, elapsed)
+        return pixels
+
+    def stats(self):
+        if not self.presents:
+            return "no frames presented"
+        mode = "page flip" if self.flipping else "copy"
+        return (f"{self.presents} frames ({mode}), avg {1000 * self.total / self.presents:.2f} ms "
+                f"worst {1000 * self.worst:.2f} ms, {self.pixels // self.presents} px/frame")
+
+    def reset_stats(self):
+        self.presents = 0
+        self.pixels = 0
+        self.total = 0.0
+        self.worst = 0.0
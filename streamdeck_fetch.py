@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Background Fetchers
+Dashboard data comes from one worker thread per source (Pi stats, Windows
+PC, Pi-hole, Docker) refreshing on its own cadence into a DataStore that
+keeps the latest good value and when it was fetched. Renderers only read
+the store, so a sleeping PC or a slow Pi-hole never blocks touch handling;
+a failed fetch keeps the previous value and lets it age, and the dashboard
+shows that age on its cards.
+
+Sources the Windows agent pushes (system stats, Docker containers) come
+from one persistent WebSocket subscription (StreamSubscriber) to just the
+topics the dashboards show, as a snapshot then field-level deltas; it
+reconnects with backoff and their HTTP fetchers only poll while it's down.
+
+Button presses go the other way through ActionDispatcher: the touch
+handler only queues them, and one worker sends them to the agent over a
+keep-alive session, retrying connection failures with bounded backoff and
+recording each action's round-trip time.
+
+Used by the generated Pi script.
+
+Requirements: pip install requests (websockets >= 12 for the push stream, optional)
+"""
+
+import json
+import queue
+import threading
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+class DataStore:
+    """Latest value per source with the time.monotonic() it was fetched.
+
+    version(name) only moves when a fetch brings a different value, so a
+    renderer can tell "refreshed" from "changed".
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}    # name -> (value, fetched_at)
+        self.failures = {}  # name -> consecutive failed fetches
+        self.versions = {}  # name -> number of distinct values seen
+
+    def put(self, name, value):
+        with self.lock:
+            entry = self.values.get(name)
+            if entry is None or entry[0] != value:
+                self.versions[name] = self.versions.get(name, 0) + 1
+            self.values[name] = (value, time.monotonic())
+            self.failures[name] = 0
+
+    def fail(self, name):
+        with self.lock:
+            self.failures[name] = self.failures.get(name, 0) + 1
+
+    def get(self, name, default=None):
+        entry = self.values.get(name)
+        return entry[0] if entry else default
+
+    def version(self, name):
+        return self.versions.get(name, 0)
+
+    def exclude(self, seconds):
+        """Don't count `seconds` (e.g. spent idle with the fetchers paused) toward any value's age"""
+        now = time.monotonic()
+        with self.lock:
+            for name, (value, fetched_at) in self.values.items():
+                self.values[name] = (value, min(fetched_at + seconds, now))
+
+    def age(self, name):
+        """Seconds since the last good fetch, None if there never was one"""
+        entry = self.values.get(name)
+        return time.monotonic() - entry[1] if entry else None
+
+def age_text(seconds):
+    """Short age for a staleness marker: 42s, 5m, 3h"""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
+class Fetcher(threading.Thread):
+    """Calls fetch() every interval seconds (idle_interval while its page is hidden).
+
+    fetch returns the new value, or None when the source can't be reached;
+    on_update(name) runs on this thread after every attempt. While skip()
+    is true (e.g. a push stream is delivering this source) nothing is fetched;
+    while paused the thread just waits to be resumed.
+    """
+
+    def __init__(self, store, name, fetch, interval, idle_interval=30.0, on_update=None, skip=None):
+        super().__init__(name=f"fetch-{name}", daemon=True)
+        self.store = store
+        self.source = name
+        self.fetch = fetch
+        self.interval = interval
+        self.idle_interval = max(idle_interval, interval)
+        self.on_update = on_update
+        self.skip = skip
+        self.active = False
+        self.paused = False
+        self.wakeup = threading.Event()
+
+    def set_active(self, active):
+        """Visible sources refresh at interval; becoming visible fetches right away"""
+        if active and not self.active:
+            self.wakeup.set()
+        self.active = active
+
+    def set_paused(self, paused):
+        """Paused fetchers make no requests at all; resuming fetches right away"""
+        self.paused = paused
+        if not paused:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.clear()
+            if self.paused:
+                self.wakeup.wait()
+                continue
+            started = time.monotonic()
+            if not (self.skip and self.skip()):
+                self.poll()
+            interval = self.interval if self.active else self.idle_interval
+            self.wakeup.wait(max(0.0, started + interval - time.monotonic()))
+
+    def poll(self):
+        try:
+            value = self.fetch()
+        except:
+            value = None
+        if value is None:
+            self.store.fail(self.source)
+        else:
+            self.store.put(self.source, value)
+        if self.on_update:
+            self.on_update(self.source)
+
+class StreamSubscriber(threading.Thread):
+    """One persistent WebSocket subscription feeding the store.
+
+    topics maps the agent's topics to store sources ({"cpu": "windows",
+    "docker": "docker"...}); a source's value is the merged fields of its
+    topics. On connect it subscribes and gets a snapshot, then per-topic
+    field deltas with sequence numbers; a gap re-subscribes for a fresh
+    snapshot, ignoring the deltas still in flight until it arrives.
+    Heartbeats keep unchanged sources from ageing. connected stays true
+    while these keep arriving (an agent that only sends full payloads never
+    counts as connected, so HTTP polling carries on). A dropped or silent
+    connection (nothing for `silence` seconds) is reopened with backoff.
+    set_paused(True) closes the connection until set_paused(False).
+    """
+
+    def __init__(self, store, url, topics, on_update=None, silence=10.0, backoff=1.0, max_backoff=30.0):
+        super().__init__(name="stream", daemon=True)
+        self.store = store
+        self.url = url
+        self.topics = topics
+        self.on_update = on_update
+        self.silence = silence
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.fields = {}  # agent topic -> its fields as last received
+        self.seqs = {}    # agent topic -> seq of the last delta applied
+        self.values = {}  # source -> merged fields last put in the store
+        self.resync_pending = False  # subscribed, snapshot not in yet
+        self.messages = 0
+        self.bytes = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self.running = threading.Event()
+        self.running.set()
+        self.ws = None
+
+    def run(self):
+        if ws_connect is None:
+            print("websockets not installed, polling the agent over HTTP")
+            return
+        delay = self.backoff
+        while True:
+            self.running.wait()
+            try:
+                with ws_connect(self.url, open_timeout=3, close_timeout=1) as ws:
+                    self.ws = ws
+                    self.subscribe()
+                    delay = self.backoff
+                    while self.running.is_set():
+                        self.receive(ws.recv(timeout=self.silence))
+            except:
+                pass
+            self.ws = None
+            self.connected = False
+            if not self.running.is_set():
+                continue
+            self.reconnects += 1
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def subscribe(self):
+        """Ask for a snapshot of our topics; deltas are ignored until it arrives"""
+        self.fields, self.seqs = {}, {}
+        self.resync_pending = True
+        if self.ws:
+            self.ws.send(json.dumps({"subscribe": sorted(self.topics)}))
+
+    def set_paused(self, paused):
+        if not paused:
+            self.running.set()
+            return
+        self.running.clear()
+        ws = self.ws
+        if ws:
+            try:
+                ws.close()
+            except:
+                pass
+
+    def receive(self, message):
+        self.messages += 1
+        self.bytes += len(message)
+        data = json.loads(message)
+        kind = data.get("type")
+        if kind not in ("snapshot", "delta", "heartbeat"):
+            return  # full payload from an agent without topics
+        self.connected = True
+        if kind == "snapshot":
+            self.resync_pending = False
+        elif kind == "delta" and self.resync_pending:
+            return  # sent before our snapshot, which will include it
+        changed = set()
+        for topic, part in data.get("topics", {}).items():
+            source = self.topics.get(topic)
+            if source is None:
+                continue
+            if kind == "snapshot":
+                self.fields[topic] = dict(part["set"])
+            else:
+                last = self.seqs.get(topic, 0)
+                if part["seq"] <= last:
+                    continue  # already in our snapshot
+                if part["seq"] != last + 1:
+                    self.resyncs += 1
+                    self.subscribe()
+                    return
+                fields = self.fields.setdefault(topic, {})
+                fields.update(part["set"])
+                for name in part.get("unset", ()):
+                    fields.pop(name, None)
+            self.seqs[topic] = part["seq"]
+            changed.add(source)
+        for source in changed:
+            value = {}
+            for topic, topic_source in self.topics.items():
+                if topic_source == source:
+                    value.update(self.fields.get(topic, {}))
+            self.values[source] = value
+        # A heartbeat (or a delta for other topics) says the rest is still current
+        for source, value in self.values.items():
+            self.store.put(source, value)
+            if self.on_update:
+                self.on_update(source)
+
+    def stats(self):
+        state = 'connected' if self.connected else 'down'
+        return (f"{state}, {self.messages} messages ({self.bytes // 1024} KB), "
+                f"{self.resyncs} resyncs, {self.reconnects} reconnects")
+
+def never_sent(error):
+    """True if a requests error means no connection was opened, so the request never left"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+class ActionDispatcher(threading.Thread):
+    """Queue of button actions sent in order by one worker over a keep-alive session.
+
+    Only failures to open a connection are retried (never_sent): the request
+    never reached the agent, so repeating it can't fire an action twice. A
+    reset or abort once the request may have been written is not retried.
+    Retries back off from backoff to max_backoff, and an action older than
+    max_age is dropped rather than fired late. Agent actions are a hotkey or
+    a Popen, answered in milliseconds, so the read timeout is short: a hung
+    reply holds up the presses queued behind it for at most that long.
+    """
+
+    def __init__(self, timeout=(0.5, 1.0), retries=3, backoff=0.1, max_backoff=1.0, max_age=3.0, max_queue=16):
+        super().__init__(name="actions", daemon=True)
+        self.timeout = timeout  # (connect, read) seconds
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_age = max_age
+        self.queue = queue.Queue(max_queue)
+        self.session = requests.Session()
+        self.rtt = {}  # action -> [count, total, worst] seconds
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, action, url):
+        """Never blocks; returns False if the queue is full and the press was dropped"""
+        try:
+            self.queue.put_nowait((action, url, time.monotonic()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            action, url, queued = self.queue.get()
+            self.send(action, url, queued)
+
+    def send(self, action, url, queued):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            if time.monotonic() - queued > self.max_age:
+                self.dropped += 1
+                return
+            started = time.monotonic()
+            try:
+                self.session.get(url, timeout=self.timeout)
+            except requests.ConnectionError as e:
+                if not never_sent(e) or attempt == self.retries:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            except:
+                break
+            self.record(action, time.monotonic() - started)
+            return
+        self.failed += 1
+
+    def record(self, action, rtt):
+        entry = self.rtt.setdefault(action, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += rtt
+        entry[2] = max(entry[2], rtt)
+
+    def stats(self):
+        parts = [f"{action} {n}x avg {1000 * total / n:.0f} ms worst {1000 * worst:.0f} ms"
+                 for action, (n, total, worst) in sorted(self.rtt.items())]
+        parts.append(f"{self.failed} failed, {self.dropped} dropped")
+        return "; ".join(parts)
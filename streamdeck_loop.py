@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Event Loop
+One selectors-based loop for the Pi script. File descriptors (touch input,
+wakeups from worker threads) and timers (dashboard refresh, GIF frames,
+stats) are separate sources. Timers run on time.monotonic() deadlines kept
+in a heap: the loop sleeps exactly until the next one is due, periodic
+timers advance from their previous deadline so they don't drift, and ready
+descriptors are handled before due timers so a slow render can't hold
+touch input back for more than one batch.
+
+Every timer firing records its lateness (fire time - deadline) under the
+timer's name; stats() summarises it. call_before_wait() callbacks run
+right before each select(), after everything the last batch drew.
+
+Used by the generated Pi script.
+
+Requirements: none (standard library)
+"""
+
+import heapq
+import itertools
+import os
+import selectors
+import time
+from collections import deque
+
+class Timer:
+    """Handle returned by call_at/call_later/call_every; cancel() just marks the heap entry dead"""
+
+    __slots__ = ("deadline", "callback", "name", "interval", "cancelled")
+
+    def __init__(self, deadline, callback, name, interval=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.name = name
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Lateness:
+    """How late one timer name fires: count, total and worst in seconds, skipped periods"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.skipped = 0
+
+    def add(self, late):
+        self.count += 1
+        self.total += late
+        if late > self.worst:
+            self.worst = late
+
+class EventLoop:
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.timers = []  # heap of (deadline, seq, Timer)
+        self.seq = itertools.count()
+        self.lateness = {}
+        self.pending = deque()
+        self.before_wait = []  # run before every select(), e.g. presenting what callbacks drew
+        # Self-pipe so worker threads can wake the select() call
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        os.set_blocking(self.wake_w, False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, self._run_pending)
+
+    def add_reader(self, fd, callback):
+        self.selector.register(fd, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, fd):
+        self.selector.unregister(fd)
+
+    def _push(self, timer):
+        heapq.heappush(self.timers, (timer.deadline, next(self.seq), timer))
+        return timer
+
+    def call_at(self, deadline, callback, name="timer"):
+        """Run callback once at a time.monotonic() deadline"""
+        return self._push(Timer(deadline, callback, name))
+
+    def call_later(self, delay, callback, name="timer"):
+        return self.call_at(time.monotonic() + delay, callback, name)
+
+    def call_every(self, interval, callback, name="timer", first=None):
+        """Run callback every interval seconds, the first time after `first` (default: interval)"""
+        delay = interval if first is None else first
+        return self._push(Timer(time.monotonic() + delay, callback, name, interval))
+
+    def call_soon_threadsafe(self, callback):
+        """Run callback on the loop thread, e.g. a network completion from a worker thread"""
+        self.pending.append(callback)
+        try:
+            os.write(self.wake_w, b"\0")
+        except BlockingIOError:
+            pass  # pipe already full, the loop is waking up anyway
+
+    def _run_pending(self):
+        try:
+            while os.read(self.wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self.pending:
+            self.pending.popleft()()
+
+    def timeout(self):
+        """Seconds until the next live timer, None if there is none"""
+        while self.timers and self.timers[0][2].cancelled:
+            heapq.heappop(self.timers)
+        if not self.timers:
+            return None
+        return max(0.0, self.timers[0][0] - time.monotonic())
+
+    def call_before_wait(self, callback):
+        self.before_wait.append(callback)
+
+    def run_once(self):
+        for callback in self.before_wait:
+            callback()
+        for key, mask in self.selector.select(self.timeout()):
+            key.data()
+        # Only timers due before this batch started; later ones wait for the next select()
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            deadline, seq, timer = heapq.heappop(self.timers)
+            if timer.cancelled:
+                continue
+            fired = time.monotonic()
+            stats = self.lateness.get(timer.name)
+            if stats is None:
+                stats = self.lateness[timer.name] = Lateness()
+            stats.add(fired - deadline)
+            if timer.interval is not None:
+                timer.deadline = deadline + timer.interval
+                if timer.deadline <= fired:
+                    # Fell a whole period behind: skip the missed ticks instead of bursting
+                    stats.skipped += int((fired - deadline) // timer.interval)
+                    timer.deadline = fired + timer.interval
+                self._push(timer)
+            timer.callback()
+
+    def run_forever(self):
+        while True:
+            self.run_once()
+
+    def stats(self):
+        parts = []
+        for name, s in sorted(self.lateness.items()):
+            avg = 1000.0 * s.total / s.count if s.count else 0.0
+            part = f"{name} {s.count}x avg {avg:.1f} ms worst {s.worst * 1000:.1f} ms late"
+            if s.skipped:
+                part += f", {s.skipped} skipped"
+            parts.append(part)
+        return "; ".join(parts) or "no timers fired"
+
+    def reset_stats(self):
+        self.lateness.clear()
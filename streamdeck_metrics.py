@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Pi Metrics
+Collects the Pi system dashboard's numbers without spawning processes or
+reopening files: /proc/stat, /proc/meminfo, /proc/uptime and the thermal
+zone stay open and are re-read with os.pread, the IP comes from a
+SIOCGIFADDR ioctl on one kept-open socket instead of `hostname -I`, and
+the disk from statvfs.
+
+Each metric has its own TTL (CPU and memory every snapshot, IP every 60 s,
+disk every 30 s...); snapshot() only refreshes the ones that expired and
+returns the same dict the dashboard always got.
+
+Used by the generated Pi script.
+
+Requirements: none (standard library, Linux)
+"""
+
+import fcntl
+import os
+import socket
+import struct
+import time
+
+SIOCGIFADDR = 0x8915
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+# Seconds each metric stays cached; 0 = refreshed on every snapshot
+DEFAULT_TTLS = {
+    "cpu": 0,
+    "mem": 0,
+    "temp": 0,
+    "uptime": 10,
+    "ip": 60,
+    "disk": 30,
+}
+
+class ProcFile:
+    """A /proc or /sys file kept open and re-read from offset 0"""
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        self.fd = None
+
+    def read(self):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDONLY)
+        try:
+            return os.pread(self.fd, self.size, 0)
+        except OSError:
+            os.close(self.fd)
+            self.fd = None
+            raise
+
+def format_uptime(seconds):
+    days = int(seconds // 86400)
+    hours = int((seconds % 86400) // 3600)
+    mins = int((seconds % 3600) // 60)
+    if days > 0:
+        return f"{days}d {hours}h"
+    elif hours > 0:
+        return f"{hours}h {mins}m"
+    else:
+        return f"{mins}m"
+
+class SystemMetrics:
+    def __init__(self, ttls=None, mount="/"):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.mount = mount
+        self.stat = ProcFile("/proc/stat", 256)
+        self.meminfo = ProcFile("/proc/meminfo", 1024)
+        self.uptime_file = ProcFile("/proc/uptime", 64)
+        self.thermal = ProcFile(THERMAL_ZONE, 16)
+        self.sock = None
+        self.last_cpu = None  # (idle, total) jiffies at the previous read
+        self.readers = {
+            "cpu": self.read_cpu, "mem": self.read_mem, "temp": self.read_temp,
+            "uptime": self.read_uptime, "ip": self.read_ip, "disk": self.read_disk,
+        }
+        self.values = {}
+        self.expires = {}
+        self.reads = 0
+        self.cached = 0
+
+    def snapshot(self):
+        """Every metric, re-reading only those whose TTL ran out"""
+        now = time.monotonic()
+        for name, read in self.readers.items():
+            if now < self.expires.get(name, 0.0):
+                self.cached += 1
+                continue
+            self.values[name] = read()
+            self.expires[name] = now + self.ttls[name]
+            self.reads += 1
+        return dict(self.values)
+
+    def read_cpu(self):
+        try:
+            parts = self.stat.read().split(b"\n", 1)[0].split()
+            idle = int(parts[4])
+            total = sum(int(p) for p in parts[1:])
+            last, self.last_cpu = self.last_cpu, (idle, total)
+            if last is None:
+                return 0
+            idle_delta = idle - last[0]
+            total_delta = total - last[1]
+            return int(100 * (1 - idle_delta / total_delta)) if total_delta else 0
+        except:
+            return 0
+
+    def read_mem(self):
+        try:
+            mem = {}
+            for line in self.meminfo.read().split(b"\n")[:5]:
+                parts = line.split()
+                if len(parts) >= 2:
+                    mem[parts[0].rstrip(b":")] = int(parts[1])
+            total = mem.get(b"MemTotal", 1)
+            available = mem.get(b"MemAvailable", 0)
+            used = total - available
+            percent = int(100 * used / total)
+            return percent, used // 1024, total // 1024
+        except:
+            return 0, 0, 0
+
+    def read_temp(self):
+        try:
+            return int(self.thermal.read().strip()) / 1000
+        except:
+            return 0
+
+    def read_uptime(self):
+        try:
+            return format_uptime(float(self.uptime_file.read().split()[0]))
+        except:
+            return "?"
+
+    def read_ip(self):
+        """First IPv4 address of a non-loopback interface, like `hostname -I`"""
+        try:
+            if self.sock is None:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for _, name in socket.if_nameindex():
+                if name == "lo":
+                    continue
+                try:
+                    ifreq = fcntl.ioctl(self.sock.fileno(), SIOCGIFADDR, struct.pack("256s", name.encode()[:15]))
+                except OSError:
+                    continue  # down or no IPv4 address
+                return socket.inet_ntoa(ifreq[20:24])
+            return "No IP"
+        except:
+            return "?"
+
+    def read_disk(self):
+        try:
+            st = os.statvfs(self.mount)
+            total = st.f_blocks * st.f_frsize
+            free = st.f_bavail * st.f_frsize
+            used = total - free
+            percent = int(100 * used / total)
+            return percent, used // (1024**3), total // (1024**3)
+        except:
+            return 0, 0, 0
+
+    def stats(self):
+        return f"{self.reads} reads, {self.cached} served from cache"
+
+if __name__ == "__main__":
+    metrics = SystemMetrics()
+    for _ in range(3):
+        print(metrics.snapshot())
+        time.sleep(1)
+    print(metrics.stats())
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Frame Pack
+Pre-renders button pages and GIF frames as ready-to-blit RGB565 and stores
+them in one contiguous atlas file.
+
+- The editor / deploy_to_pi.py build the pack on the PC and upload it
+- The generated Pi script mmaps the pack read-only at start (milliseconds)
+  and blits straight from zero-copy views of it, so the kernel pages frames
+  in and out instead of the Pi holding thousands of bytes objects
+- If the pack is missing or stale, the Pi builds it once itself
+- warm_page() faults one page's frames in ahead of time, e.g. for the
+  pages next to the one on screen
+
+Atlas layout:
+    header  - HEADER_STRUCT (fixed size)
+    index   - entry_count x INDEX_STRUCT, keyed by (kind, page, button, frame)
+    data    - all RGB565 frames in one block, starting on a page boundary;
+              identical blobs are stored once and shared by several entries
+
+GIFs keep one full keyframe (frame 0); every frame, including the wrap back
+to 0, is also stored as the rectangle that changed since the previous frame,
+and one timing entry with every frame's display time in milliseconds. A frame
+identical to the one before it is merged into it (its time added to that frame).
+
+Requirements: pip install pillow numpy
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+PACK_MAGIC = b"SDPK"
+PACK_VERSION = 5
+# magic, version, width, height, btn_w, btn_h, entry_count, index_offset, data_offset, key (sha1)
+HEADER_STRUCT = struct.Struct("<4sHHHHHIII20s")
+# kind, page, button (-1 = whole page), frame, offset into data block, length
+INDEX_STRUCT = struct.Struct("<HHhHII")
+DATA_ALIGN = 4096
+# x, y, w, h of the changed rectangle inside the button
+DELTA_STRUCT = struct.Struct("<HHHH")
+
+KIND_PAGE = 0       # full 480x320 button page
+KIND_GIF = 1        # button-sized GIF keyframe (frame 0)
+KIND_HIGHLIGHT = 2  # pressed-state patch covering get_btn_rect() inclusive
+KIND_GIF_DELTA = 3  # DELTA_STRUCT + changed rectangle vs the previous frame (empty = no change)
+KIND_GIF_TIMING = 4 # uint16 display time in ms per frame
+
+# Layout - must match the generated Pi script
+WIDTH, HEIGHT = 480, 320
+COLS, ROWS = 3, 2
+MARGIN = 10
+NAV_HEIGHT = 38
+NAV_Y = HEIGHT - NAV_HEIGHT
+BTN_W = (WIDTH - (COLS + 1) * MARGIN) // COLS
+BTN_H = (HEIGHT - NAV_HEIGHT - (ROWS + 1) * MARGIN) // ROWS
+LEFT_NAV = (0, NAV_Y, 75, HEIGHT)
+RIGHT_NAV = (WIDTH - 75, NAV_Y, WIDTH, HEIGHT)
+ICON_SIZE = 50
+# GIF frame times: browsers show 0-10 ms frames for 100 ms, so do we
+DEFAULT_FRAME_MS = 100
+MIN_FRAME_MS = 20
+PATCH_W, PATCH_H = BTN_W + 1, BTN_H + 1
+
+BG_COLOR = (8, 8, 18)
+CYBER_ORANGE = (255, 160, 0)
+CYBER_BRIGHT = (255, 230, 120)
+
+# The Pi draws its dashboards in DejaVu Sans Bold, so button pages must too. It
+# ships in fonts/ next to this module (uploaded to the Pi with it); any other
+# face would make PC-built packs differ from the dashboards, so none is tried.
+FONT_NAME = "DejaVuSans-Bold.ttf"
+FONT_PATHS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", FONT_NAME),
+    "/usr/share/fonts/truetype/dejavu/" + FONT_NAME,
+]
+FONT_SIZE = 16
+
+def find_font():
+    for path in FONT_PATHS:
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"{FONT_NAME} not found in {', '.join(FONT_PATHS)}; the frame pack can't be rendered without it")
+
+_fonts = {}
+
+def _load_font(size):
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = ImageFont.truetype(find_font(), size)
+    return font
+
+_font_ids = {}
+
+def font_id():
+    """File name and content hash of the font in use, "missing" if there is none"""
+    try:
+        path = find_font()
+    except FileNotFoundError:
+        return "missing"
+    if path not in _font_ids:
+        with open(path, "rb") as f:
+            _font_ids[path] = f"{os.path.basename(path)}:{hashlib.sha1(f.read()).hexdigest()}"
+    return _font_ids[path]
+
+# ============== PAGES ==============
+def button_pages(config):
+    """The config's button pages, in the order the Pi shows them"""
+    return [p for p in config.get("pages", []) if p.get("type", "button") == "button"]
+
+def dashboard_pages(config):
+    """The config's dashboard pages"""
+    return [p for p in config.get("pages", []) if p.get("type") == "dashboard"]
+
+# ============== KEY ==============
+def pack_key(button_pages, num_dashboard_pages):
+    """Hash of everything that changes the rendered frames"""
+    src = json.dumps({
+        "version": PACK_VERSION,
+        "layout": [WIDTH, HEIGHT, COLS, ROWS, MARGIN, NAV_HEIGHT],
+        "dashboards": num_dashboard_pages,
+        "font": font_id(),
+        "pages": button_pages,
+    }, sort_keys=True)
+    return hashlib.sha1(src.encode("utf-8")).digest()
+
+# ============== RGB565 ==============
+class RGB565Converter:
+    """RGB -> RGB565 with preallocated scratch buffers and in-place ufuncs.
+
+    convert() allocates nothing besides the one uint8 copy PIL hands out, and
+    writes the result straight into `out` (e.g. the mmap'd framebuffer view).
+    Only the final OR touches `out`, so a visible framebuffer never shows a
+    half-converted frame.
+    """
+
+    def __init__(self, width, height):
+        self.shape = (height, width)
+        self.acc = np.empty(self.shape, dtype=np.uint16)
+        self.tmp = np.empty(self.shape, dtype=np.uint16)
+
+    def convert(self, img, out=None):
+        """Convert an image up to width x height; out may be a framebuffer slice"""
+        arr = np.asarray(img)
+        h, w = arr.shape[:2]
+        if h > self.shape[0] or w > self.shape[1]:
+            raise ValueError(f"image {w}x{h} larger than converter {self.shape[1]}x{self.shape[0]}")
+        acc, tmp = self.acc[:h, :w], self.tmp[:h, :w]
+        np.right_shift(arr[:,:,0], 3, out=acc, casting='unsafe')
+        np.left_shift(acc, 11, out=acc)
+        np.right_shift(arr[:,:,1], 2, out=tmp, casting='unsafe')
+        np.left_shift(tmp, 5, out=tmp)
+        np.bitwise_or(acc, tmp, out=acc)
+        np.right_shift(arr[:,:,2], 3, out=tmp, casting='unsafe')
+        if out is None:
+            out = np.empty((h, w), dtype=np.uint16)
+        np.bitwise_or(acc, tmp, out=out)
+        return out
+
+converters = {}
+
+def to_rgb565_array(img):
+    size = img.size
+    if size not in converters:
+        converters[size] = RGB565Converter(*size)
+    return converters[size].convert(img)
+
+def to_rgb565(img):
+    return to_rgb565_array(img).tobytes()
+
+def encode_delta(prev, cur):
+    """Bytes for the rectangle of cur that differs from prev (b"" if nothing changed)"""
+    rows, cols = np.nonzero(prev != cur)
+    if not len(rows):
+        return b""
+    y1, y2 = rows.min(), rows.max() + 1
+    x1, x2 = cols.min(), cols.max() + 1
+    return DELTA_STRUCT.pack(x1, y1, x2 - x1, y2 - y1) + cur[y1:y2, x1:x2].tobytes()
+
+# ============== RENDERING ==============
+
+def get_btn_rect(idx):
+    row, col = idx // COLS, idx % COLS
+    x = MARGIN + col * (BTN_W + MARGIN)
+    y = MARGIN + row * (BTN_H + MARGIN)
+    return (x, y, x + BTN_W, y + BTN_H)
+
+def is_animated_ext(path):
+    if not path:
+        return False
+    lower = path.lower()
+    return lower.endswith('.gif') or lower.endswith('.webp')
+
+def resolve_asset(path, icons_dir):
+    """Config paths are editor-relative (streamdeck_icons\\cropped\\x.png); on the Pi only the basename exists"""
+    local_path = path.replace('\\', '/')
+    if os.path.isfile(local_path):
+        return local_path
+    return os.path.join(icons_dir, os.path.basename(local_path))
+
+def cover_resize(img, target_w, target_h):
+    img_w, img_h = img.size
+    img_ratio = img_w / img_h
+    target_ratio = target_w / target_h
+    if img_ratio > target_ratio:
+        new_h = target_h
+        new_w = int(new_h * img_ratio)
+    else:
+        new_w = target_w
+        new_h = int(new_w / img_ratio)
+    img = img.resize((new_w, new_h), Image.LANCZOS)
+    left = (new_w - target_w) // 2
+    top = (new_h - target_h) // 2
+    return img.crop((left, top, left + target_w, top + target_h))
+
+frames_cache = {}
+
+def load_frames(path, size, icons_dir, use_cover=False):
+    """All frames of an image as RGBA (one frame for static images)"""
+    if not path:
+        return None
+    cache_key = (path, size, use_cover, icons_dir)
+    if cache_key in frames_cache:
+        return frames_cache[cache_key]
+    frames_cache[cache_key] = _decode_frames(path, size, icons_dir, use_cover)
+    return frames_cache[cache_key]
+
+def _decode_frames(path, size, icons_dir, use_cover):
+    try:
+        img = Image.open(resolve_asset(path, icons_dir))
+        frames = []
+        for frame_num in range(getattr(img, 'n_frames', 1)):
+            img.seek(frame_num)
+            frame = img.convert("RGBA")
+            if use_cover:
+                frame = cover_resize(frame, size[0], size[1])
+            else:
+                frame = frame.resize(size, Image.LANCZOS)
+            frames.append(frame)
+        return frames if frames else None
+    except:
+        return None
+
+durations_cache = {}
+
+def load_durations(path, icons_dir):
+    """Display time of every frame of an animated image in ms"""
+    cache_key = (path, icons_dir)
+    if cache_key not in durations_cache:
+        durations = []
+        try:
+            img = Image.open(resolve_asset(path, icons_dir))
+            for frame_num in range(getattr(img, 'n_frames', 1)):
+                img.seek(frame_num)
+                ms = img.info.get("duration") or 0
+                durations.append(max(int(ms), MIN_FRAME_MS) if ms > 10 else DEFAULT_FRAME_MS)
+        except:
+            pass
+        durations_cache[cache_key] = durations or [DEFAULT_FRAME_MS]
+    return durations_cache[cache_key]
+
+def draw_nav_bar(draw, page_num, total_pages):
+    draw.rectangle([0, NAV_Y, WIDTH, HEIGHT], fill=(10, 10, 18))
+    draw.line([0, NAV_Y, WIDTH, NAV_Y], fill=CYBER_ORANGE, width=2)
+    if page_num > 0:
+        draw.rectangle([LEFT_NAV[0]+2, NAV_Y+4, LEFT_NAV[2]-2, HEIGHT-4], outline=CYBER_ORANGE, width=2)
+        draw.text((30, NAV_Y + 8), "<", fill=CYBER_BRIGHT, font=_load_font(FONT_SIZE))
+    else:
+        draw.rectangle([LEFT_NAV[0]+2, NAV_Y+4, LEFT_NAV[2]-2, HEIGHT-4], outline=(80, 60, 20), width=1)
+        draw.text((30, NAV_Y + 8), "<", fill=(80, 60, 20), font=_load_font(FONT_SIZE))
+    if page_num < total_pages - 1:
+        draw.rectangle([RIGHT_NAV[0]+2, NAV_Y+4, RIGHT_NAV[2]-2, HEIGHT-4], outline=CYBER_ORANGE, width=2)
+        draw.text((WIDTH - 45, NAV_Y + 8), ">", fill=CYBER_BRIGHT, font=_load_font(FONT_SIZE))
+    else:
+        draw.rectangle([RIGHT_NAV[0]+2, NAV_Y+4, RIGHT_NAV[2]-2, HEIGHT-4], outline=(80, 60, 20), width=1)
+        draw.text((WIDTH - 45, NAV_Y + 8), ">", fill=(80, 60, 20), font=_load_font(FONT_SIZE))
+    center_x = WIDTH // 2
+    dot_spacing = 18
+    total_dots_width = (total_pages - 1) * dot_spacing
+    btn_w = total_dots_width + 40
+    draw.rectangle([center_x - btn_w//2, NAV_Y+4, center_x + btn_w//2, HEIGHT-4], outline=CYBER_ORANGE, width=2)
+    dots_start_x = center_x - total_dots_width // 2
+    dot_y = NAV_Y + (HEIGHT - NAV_Y) // 2
+    for i in range(total_pages):
+        dot_x = dots_start_x + i * dot_spacing
+        if i == page_num:
+            draw.ellipse([dot_x - 5, dot_y - 5, dot_x + 5, dot_y + 5], fill=CYBER_ORANGE)
+        else:
+            draw.ellipse([dot_x - 3, dot_y - 3, dot_x + 3, dot_y + 3], fill=(200, 200, 200))
+
+def draw_button(img, draw, btn, x1, y1, icons_dir, highlight=False):
+    """One button at (x1, y1); highlighted = white face, label only"""
+    x2, y2 = x1 + BTN_W, y1 + BTN_H
+    color = (255, 255, 255) if highlight else tuple(btn.get("color", [60, 60, 80]))
+    draw.rounded_rectangle([x1, y1, x2, y2], radius=12, fill=color, outline=CYBER_ORANGE, width=2)
+    if not highlight:
+        bg_frames = load_frames(btn.get("background"), (BTN_W - 4, BTN_H - 4), icons_dir, use_cover=True)
+        if bg_frames:
+            img.paste(bg_frames[0], (x1 + 2, y1 + 2), bg_frames[0])
+        icon_frames = load_frames(btn.get("icon"), (ICON_SIZE, ICON_SIZE), icons_dir)
+        if icon_frames:
+            img.paste(icon_frames[0], (x1 + (BTN_W - ICON_SIZE) // 2, y1 + 10), icon_frames[0])
+    label = btn.get("label", "")
+    if label:
+        font = _load_font(FONT_SIZE)
+        bbox = draw.textbbox((0, 0), label, font=font)
+        tw = bbox[2] - bbox[0]
+        draw.text((x1 + (BTN_W - tw) // 2, y2 - 25), label, fill=CYBER_BRIGHT, font=font)
+
+def render_page_frame(page, page_num, total_pages, icons_dir):
+    """Full 480x320 frame of a button page"""
+    img = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
+    draw = ImageDraw.Draw(img)
+    for i, btn in enumerate(page.get("buttons", [])):
+        x1, y1, x2, y2 = get_btn_rect(i)
+        draw_button(img, draw, btn, x1, y1, icons_dir)
+    draw_nav_bar(draw, page_num, total_pages)
+    return img
+
+def render_highlight_patch(btn, icons_dir):
+    """Pressed state of one button, PATCH_W x PATCH_H, blitted over get_btn_rect()"""
+    img = Image.new("RGB", (PATCH_W, PATCH_H), BG_COLOR)
+    draw_button(img, ImageDraw.Draw(img), btn, 0, 0, icons_dir, highlight=True)
+    return img
+
+def render_gif_button_frames(btn, icons_dir):
+    """Button-sized frames for an animated button (background and/or icon GIF)"""
+    bg_frames = None
+    icon_frames = None
+    if is_animated_ext(btn.get("background")):
+        bg_frames = load_frames(btn.get("background"), (BTN_W - 4, BTN_H - 4), icons_dir, use_cover=True)
+    if is_animated_ext(btn.get("icon")):
+        icon_frames = load_frames(btn.get("icon"), (ICON_SIZE, ICON_SIZE), icons_dir)
+    num_frames = max(len(bg_frames) if bg_frames else 1, len(icon_frames) if icon_frames else 1)
+    frames = []
+    for f_idx in range(num_frames):
+        btn_img = Image.new("RGB", (BTN_W, BTN_H), tuple(btn.get("color", [60, 60, 80])))
+        draw = ImageDraw.Draw(btn_img)
+        draw.rounded_rectangle([0, 0, BTN_W-1, BTN_H-1], radius=12, outline=CYBER_ORANGE, width=2)
+        if bg_frames:
+            frame = bg_frames[f_idx % len(bg_frames)]
+            btn_img.paste(frame, (2, 2), frame)
+        if icon_frames:
+            frame = icon_frames[f_idx % len(icon_frames)]
+            btn_img.paste(frame, ((BTN_W - ICON_SIZE) // 2, 10), frame)
+        label = btn.get("label", "")
+        if label:
+            font = _load_font(FONT_SIZE)
+            bbox = draw.textbbox((0, 0), label, font=font)
+            draw.text(((BTN_W - bbox[2] + bbox[0]) // 2, BTN_H - 25), label, fill=CYBER_BRIGHT, font=font)
+        frames.append(btn_img)
+    return frames
+
+def gif_button_durations(btn, icons_dir, num_frames):
+    """Per-frame ms for an animated button, timed by whichever GIF has the most frames"""
+    timings = [load_durations(btn.get(k), icons_dir) for k in ("background", "icon") if is_animated_ext(btn.get(k))]
+    timing = max(timings, key=len) if timings else [DEFAULT_FRAME_MS]
+    return [timing[f_idx % len(timing)] for f_idx in range(num_frames)]
+
+def merge_repeats(frames, durations):
+    """Drop frames identical to the one before them, adding their display time to it"""
+    kept, kept_ms = frames[:1], durations[:1]
+    for frame, ms in zip(frames[1:], durations[1:]):
+        if np.array_equal(frame, kept[-1]):
+            kept_ms[-1] = min(kept_ms[-1] + ms, 0xFFFF)
+        else:
+            kept.append(frame)
+            kept_ms.append(ms)
+    return kept, kept_ms
+
+# ============== PACK FILE ==============
+def build_pack(button_pages, num_dashboard_pages, icons_dir, log=print):
+    """Render every button page, highlight patch and GIF frame; return the atlas bytes"""
+    total_pages = num_dashboard_pages + len(button_pages)
+    frames_cache.clear()
+    durations_cache.clear()
+    index = []
+    blobs = []
+    data_len = 0
+    offsets = {}  # sha1 of blob -> offset, identical frames are stored once
+
+    def add(kind, page, button, frame, data):
+        nonlocal data_len
+        digest = hashlib.sha1(data).digest()
+        offset = offsets.get(digest)
+        if offset is None:
+            offset = offsets[digest] = data_len
+            blobs.append(data)
+            data_len += len(data)
+        index.append(INDEX_STRUCT.pack(kind, page, button, frame, offset, len(data)))
+
+    for p_idx, page in enumerate(button_pages):
+        page_num = num_dashboard_pages + p_idx
+        add(KIND_PAGE, p_idx, -1, 0, to_rgb565(render_page_frame(page, page_num, total_pages, icons_dir)))
+        for i, btn in enumerate(page.get("buttons", [])):
+            add(KIND_HIGHLIGHT, p_idx, i, 0, to_rgb565(render_highlight_patch(btn, icons_dir)))
+    log(f"Rendered {len(button_pages)} button pages and {len(index) - len(button_pages)} highlight patches")
+
+    gif_count = 0
+    full_bytes = 0
+    data_before = data_len
+    for p_idx, page in enumerate(button_pages):
+        for b_idx, btn in enumerate(page.get("buttons", [])):
+            if not (is_animated_ext(btn.get("background")) or is_animated_ext(btn.get("icon"))):
+                continue
+            frames = [to_rgb565_array(frame).copy() for frame in render_gif_button_frames(btn, icons_dir)]
+            frames, durations = merge_repeats(frames, gif_button_durations(btn, icons_dir, len(frames)))
+            add(KIND_GIF, p_idx, b_idx, 0, frames[0].tobytes())
+            for f_idx, frame in enumerate(frames):
+                add(KIND_GIF_DELTA, p_idx, b_idx, f_idx, encode_delta(frames[f_idx - 1], frame))
+            add(KIND_GIF_TIMING, p_idx, b_idx, 0, np.array(durations, dtype=np.uint16).tobytes())
+            gif_count += len(frames)
+            full_bytes += len(frames) * BTN_W * BTN_H * 2
+    log(f"Rendered {gif_count} GIF frames ({(data_len - data_before) // 1024} KB as deltas, {full_bytes // 1024} KB as full frames)")
+    frames_cache.clear()
+    durations_cache.clear()
+
+    index_offset = HEADER_STRUCT.size
+    data_offset = index_offset + len(index) * INDEX_STRUCT.size
+    data_offset = (data_offset + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+    header = HEADER_STRUCT.pack(PACK_MAGIC, PACK_VERSION, WIDTH, HEIGHT, BTN_W, BTN_H,
+                                len(index), index_offset, data_offset,
+                                pack_key(button_pages, num_dashboard_pages))
+    head = header + b"".join(index)
+    return head + b"\0" * (data_offset - len(head)) + b"".join(blobs)
+
+def write_pack(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class FrameAtlas:
+    """Read-only view of a frame pack; frames are memoryview slices of one buffer"""
+
+    def __init__(self, buf, key=None):
+        if len(buf) < HEADER_STRUCT.size:
+            raise ValueError("frame pack too short")
+        (magic, version, width, height, btn_w, btn_h,
+         entry_count, index_offset, data_offset, pack_key_) = HEADER_STRUCT.unpack_from(buf, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError("not a frame pack or wrong version")
+        if key is not None and pack_key_ != key:
+            raise ValueError("frame pack does not match config")
+        if (width, height, btn_w, btn_h) != (WIDTH, HEIGHT, BTN_W, BTN_H):
+            raise ValueError("frame pack layout mismatch")
+        if index_offset + entry_count * INDEX_STRUCT.size > data_offset or data_offset > len(buf):
+            raise ValueError("frame pack truncated")
+
+        self.index = {}
+        self.page_keys = {}  # page -> index keys of all its frames
+        self.gif_frame_counts = {}
+        for i in range(entry_count):
+            kind, page, button, frame, offset, length = INDEX_STRUCT.unpack_from(buf, index_offset + i * INDEX_STRUCT.size)
+            start = data_offset + offset
+            if start + length > len(buf):
+                raise ValueError("frame pack truncated")
+            self.index[(kind, page, button, frame)] = (start, length)
+            self.page_keys.setdefault(page, []).append((kind, page, button, frame))
+            if kind == KIND_GIF_DELTA:
+                self.gif_frame_counts[(page, button)] = max(self.gif_frame_counts.get((page, button), 0), frame + 1)
+        self.buf = memoryview(buf)
+        self.arrays = {}
+        self.deltas = {}
+        self.durations = {}
+
+    def get(self, kind, page, button, frame=0):
+        entry = self.index.get((kind, page, button, frame))
+        if entry is None:
+            return None
+        start, length = entry
+        return self.buf[start:start + length]
+
+    def page_frame(self, page):
+        return self.get(KIND_PAGE, page, -1)
+
+    def highlight_patch(self, page, button):
+        return self.get(KIND_HIGHLIGHT, page, button)
+
+    def gif_frame(self, page, button):
+        """Full keyframe (frame 0) of an animated button"""
+        return self.get(KIND_GIF, page, button)
+
+    def get_array(self, kind, page, button, frame, shape):
+        """Zero-copy uint16 view of a frame, pre-shaped for 2-D slice blits"""
+        key = (kind, page, button, frame)
+        arr = self.arrays.get(key)
+        if arr is None:
+            data = self.get(kind, page, button, frame)
+            if data is None:
+                return None
+            arr = np.frombuffer(data, dtype=np.uint16).reshape(shape)
+            self.arrays[key] = arr
+        return arr
+
+    def page_array(self, page):
+        return self.get_array(KIND_PAGE, page, -1, 0, (HEIGHT, WIDTH))
+
+    def highlight_array(self, page, button):
+        return self.get_array(KIND_HIGHLIGHT, page, button, 0, (PATCH_H, PATCH_W))
+
+    def gif_delta(self, page, button, frame):
+        """(x, y, array) changed since the previous frame, relative to the button; None = unchanged"""
+        key = (page, button, frame)
+        if key not in self.deltas:
+            data = self.get(KIND_GIF_DELTA, page, button, frame)
+            delta = None
+            if data is not None and len(data) > DELTA_STRUCT.size:
+                x, y, w, h = DELTA_STRUCT.unpack_from(data, 0)
+                arr = np.frombuffer(data, dtype=np.uint16, offset=DELTA_STRUCT.size).reshape(h, w)
+                delta = (x, y, arr)
+            self.deltas[key] = delta
+        return self.deltas[key]
+
+    def gif_durations(self, page, button):
+        """Display time of every frame in seconds"""
+        key = (page, button)
+        if key not in self.durations:
+            data = self.get(KIND_GIF_TIMING, page, button)
+            ms = np.frombuffer(data, dtype=np.uint16) if data else [DEFAULT_FRAME_MS]
+            self.durations[key] = [int(v) / 1000.0 for v in ms]
+        return self.durations[key]
+
+    def gif_array(self, page, button):
+        return self.get_array(KIND_GIF, page, button, 0, (BTN_H, BTN_W))
+
+    def warm_page(self, page):
+        """Build the views of every frame of a page and fault its memory in; returns bytes touched"""
+        touched = 0
+        for key in self.page_keys.get(page, ()):
+            kind, _, button, frame = key
+            if kind == KIND_PAGE:
+                self.page_array(page)
+            elif kind == KIND_HIGHLIGHT:
+                self.highlight_array(page, button)
+            elif kind == KIND_GIF:
+                self.gif_array(page, button)
+            elif kind == KIND_GIF_DELTA:
+                self.gif_delta(page, button, frame)
+            elif kind == KIND_GIF_TIMING:
+                self.gif_durations(page, button)
+            start, length = self.index[key]
+            if length:
+                # One read per memory page maps it now instead of on the first blit
+                np.frombuffer(self.buf[start:start + length], dtype=np.uint8)[::mmap.PAGESIZE].max()
+                touched += length
+        return touched
+
+    def __len__(self):
+        return len(self.index)
+
+def load_pack(path, button_pages, num_dashboard_pages):
+    """mmap the pack read-only if it matches this config"""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+        mm.madvise(mmap.MADV_RANDOM)
+    try:
+        return FrameAtlas(mm, pack_key(button_pages, num_dashboard_pages))
+    except (ValueError, struct.error):
+        mm.close()
+        return None
+
+def load_or_build_pack(path, button_pages, num_dashboard_pages, icons_dir):
+    """Pi side: mmap the uploaded pack, or pre-render once and save it for the next start"""
+    atlas = load_pack(path, button_pages, num_dashboard_pages)
+    if atlas is not None:
+        return atlas
+    print("Frame pack missing or stale, pre-rendering on the Pi...")
+    data = build_pack(button_pages, num_dashboard_pages, icons_dir)
+    try:
+        write_pack(path, data)
+        atlas = load_pack(path, button_pages, num_dashboard_pages)
+        if atlas is not None:
+            return atlas
+    except OSError as e:
+        print(f"Could not save frame pack: {e}")
+    return FrameAtlas(data)
+
+if __name__ == "__main__":
+    import sys
+    # --deploy: pack for deploy_to_pi.py's fixed dashboards instead of the editor's dashboard pages
+    args = [a for a in sys.argv[1:] if a != "--deploy"]
+    config_file = args[0] if len(args) > 0 else "streamdeck_config_v3.json"
+    out_file = args[1] if len(args) > 1 else "streamdeck_frames.pack"
+    with open(config_file, "r") as f:
+        config = json.load(f)
+    if "--deploy" in sys.argv:
+        from deploy_to_pi import NUM_DASHBOARD_PAGES as num_dashboard_pages
+    else:
+        num_dashboard_pages = len(dashboard_pages(config))
+    data = build_pack(button_pages(config), num_dashboard_pages, "streamdeck_icons")
+    write_pack(out_file, data)
+    print(f"Wrote {out_file}: {len(data)} bytes")
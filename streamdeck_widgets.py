@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+StreamDeck Retained Dashboard Widgets
+Dashboards are built once from widgets (segmented bars, value labels,
+container cards). Static chrome (boxes, titles, nav bar, empty bar tracks)
+is rendered once into a base layer, kept as an image and as RGB565. Each
+widget keeps its last value and rectangle; a refresh restores only the
+widgets whose value changed from the base, paints them and flushes just
+their rectangles to the framebuffer. When a dashboard comes on screen the
+RGB565 base is copied in as-is and only the widgets are converted.
+prepare() does the same work ahead of time for a dashboard that is off
+screen, into its own RGB565 frame, so showing it later is a single copy.
+
+Text goes through text_cache: rasterised runs are kept in an LRU keyed by
+(font, text, colour), and numbers in a new value are composited from a
+per-font digit glyph atlas instead of asking FreeType again.
+
+Used by the generated Pi script.
+
+Requirements: pip install pillow numpy
+"""
+
+import re
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Dashboard whose pixels are on the framebuffer right now (None = something else)
+screen_owner = None
+
+def release_screen():
+    """Call whenever something other than a Dashboard draws to the framebuffer"""
+    global screen_owner
+    screen_owner = None
+
+def union_rect(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+# ============== TEXT CACHE ==============
+ATLAS_CHARS = "0123456789.,%"
+# Digit runs are only composited after these; letters next to digits may kern
+ATLAS_AFTER = " :(/"
+ATLAS_PROBES = ["0123456789", "LOAD: 42%", "TEMP: 51C", "1,234.5 GB", "CPU (16c)"]
+SEGMENT_RE = re.compile(f"[{re.escape(ATLAS_CHARS)}]+|[^{re.escape(ATLAS_CHARS)}]+")
+
+def rasterize(font, text):
+    """(bbox relative to the text origin, uint8 coverage array) of one text run"""
+    bbox = font.getbbox(text)
+    w, h = max(bbox[2] - bbox[0], 0), max(bbox[3] - bbox[1], 0)
+    if not w or not h:
+        return bbox, np.zeros((0, 0), dtype=np.uint8)
+    img = Image.new("L", (w, h))
+    ImageDraw.Draw(img).text((-bbox[0], -bbox[1]), text, fill=255, font=font)
+    return bbox, np.asarray(img)
+
+def merge_masks(parts):
+    """Union of (x, y, mask) pieces; overlapping coverage keeps the max like FreeType does"""
+    parts = [p for p in parts if p[2].size]
+    if not parts:
+        return (0, 0, 0, 0), np.zeros((0, 0), dtype=np.uint8)
+    x1 = min(x for x, y, m in parts)
+    y1 = min(y for x, y, m in parts)
+    x2 = max(x + m.shape[1] for x, y, m in parts)
+    y2 = max(y + m.shape[0] for x, y, m in parts)
+    out = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+    for x, y, m in parts:
+        region = out[y - y1:y - y1 + m.shape[0], x - x1:x - x1 + m.shape[1]]
+        np.maximum(region, m, out=region)
+    return (x1, y1, x2, y2), out
+
+class GlyphAtlas:
+    """Pre-rasterised digit glyphs of one font: char -> (x, y, mask, advance)"""
+
+    def __init__(self, font, chars=ATLAS_CHARS):
+        self.font = font
+        self.glyphs = {}
+        for ch in chars:
+            bbox, mask = rasterize(font, ch)
+            self.glyphs[ch] = (bbox[0], bbox[1], mask, round(font.getlength(ch)))
+
+class TextCache:
+    """LRU of rendered text runs keyed by (font, text, colour) with hit/miss counters"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.runs = OrderedDict()    # (font, text, fill) -> (bbox, L mask image or None)
+        self.pieces = OrderedDict()  # (font, text) -> (bbox, mask) non-digit parts of composed runs
+        self.atlases = {}
+        self.hits = 0
+        self.misses = 0
+        self.composed = 0
+
+    def add_atlas(self, font):
+        """Build the digit atlas for a font; kept only if it reproduces FreeType exactly"""
+        try:
+            atlas = GlyphAtlas(font)
+            for probe in ATLAS_PROBES:
+                bbox, mask = rasterize(font, probe)
+                composed = self.compose(font, atlas, probe)
+                if composed is None or tuple(composed[0]) != tuple(bbox) or not np.array_equal(composed[1], mask):
+                    return False
+        except:
+            return False
+        self.atlases[font] = atlas
+        return True
+
+    def piece(self, font, text):
+        key = (font, text)
+        entry = self.pieces.get(key)
+        if entry is None:
+            entry = self.pieces[key] = rasterize(font, text)
+            if len(self.pieces) > self.max_entries:
+                self.pieces.popitem(last=False)
+        else:
+            self.pieces.move_to_end(key)
+        return entry
+
+    def compose(self, font, atlas, text):
+        """Digits from the atlas, the rest from cached pieces; None if it can't be done exactly"""
+        parts = []
+        pos = 0
+        for seg in SEGMENT_RE.findall(text):
+            pen = round(font.getlength(text[:pos])) if pos else 0
+            if seg[0] in atlas.glyphs:
+                if pos and text[pos - 1] not in ATLAS_AFTER:
+                    return None
+                for ch in seg:
+                    x, y, mask, advance = atlas.glyphs[ch]
+                    parts.append((pen + x, y, mask))
+                    pen += advance
+            else:
+                bbox, mask = self.piece(font, seg)
+                parts.append((pen + bbox[0], bbox[1], mask))
+            pos += len(seg)
+        return merge_masks(parts)
+
+    def lookup(self, text, font, fill):
+        key = (font, text, fill)
+        entry = self.runs.get(key)
+        if entry is not None:
+            self.runs.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        atlas = self.atlases.get(font)
+        built = None
+        if atlas and any(ch in atlas.glyphs for ch in text):
+            built = self.compose(font, atlas, text)
+        if built is None:
+            built = rasterize(font, text)
+        else:
+            self.composed += 1
+        bbox, mask = built
+        entry = self.runs[key] = (tuple(bbox), Image.fromarray(mask, "L") if mask.size else None)
+        if len(self.runs) > self.max_entries:
+            self.runs.popitem(last=False)
+        return entry
+
+    def draw(self, image, xy, text, fill, font):
+        """Paste a cached run at xy; returns its exclusive bbox on the image"""
+        bbox, mask = self.lookup(text, font, fill)
+        x, y = xy
+        if mask is not None:
+            image.paste(fill, (x + bbox[0], y + bbox[1]), mask)
+        return (x + bbox[0], y + bbox[1], x + bbox[2], y + bbox[3])
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (f"{self.hits} hits, {self.misses} misses ({self.composed} from glyph atlas), "
+                f"{rate:.1f}% hit rate, {len(self.runs)} runs cached")
+
+text_cache = TextCache()
+
+class Widget:
+    """Fixed rectangle (x1, y1, x2, y2 exclusive) painted by paint(draw, value).
+
+    key(value) decides what counts as a visible change, e.g. a segmented bar
+    only redraws when its number of filled segments changes. static(draw)
+    paints the parts that never change (bar tracks) into the base layer.
+    """
+
+    def __init__(self, rect, paint, key=None, static=None):
+        self.rect = rect
+        self.paint = paint
+        self.key = key
+        self.static = static
+        self.value = None
+        self.shown_key = None  # None = only the base layer is showing
+
+    def set(self, value):
+        self.value = value
+
+    def visible_key(self):
+        if self.value is None or self.key is None:
+            return self.value
+        return self.key(self.value)
+
+    @property
+    def dirty(self):
+        return self.visible_key() != self.shown_key
+
+    def reset(self):
+        """The canvas under this widget is back to the base layer"""
+        self.shown_key = None
+
+    def render(self, dash):
+        dash.restore(self.rect)
+        if self.value is not None:
+            self.paint(dash.draw, self.value)
+        self.shown_key = self.visible_key()
+        return self.rect
+
+class Label(Widget):
+    """Text at a fixed position; the dirty rectangle follows the text's bounding box"""
+
+    def __init__(self, x, y, font, fill):
+        super().__init__(None, None)
+        self.x, self.y = x, y
+        self.font = font
+        self.fill = fill
+
+    def reset(self):
+        super().reset()
+        self.rect = None
+
+    def render(self, dash):
+        old = self.rect
+        if old:
+            dash.restore(old)
+        new = None
+        if self.value:
+            new = dash.text((self.x, self.y), str(self.value), self.fill, self.font)
+        self.rect = new
+        self.shown_key = self.visible_key()
+        return union_rect(old, new)
+
+class Dashboard:
+    """Static base layer + retained canvas + named widgets; present() flushes only what changed"""
+
+    def __init__(self, paint_static, width, height, bg):
+        self.paint_static = paint_static
+        self.width, self.height = width, height
+        self.bg = bg
+        self.base = None
+        self.base565 = None
+        self.canvas = None
+        self.draw = None
+        self.widgets = {}
+        self.flushed_pixels = 0
+        self.frame565 = None  # off-screen RGB565 copy of the canvas, valid while warm
+        self.warm = False
+
+    def add(self, name, widget):
+        self.widgets[name] = widget
+        return widget
+
+    def set(self, name, value):
+        self.widgets[name].set(value)
+
+    def update(self, values):
+        for name, value in values.items():
+            self.widgets[name].set(value)
+
+    def render_base(self, converter):
+        """Paint the static chrome once (call after all widgets are added)"""
+        self.base = Image.new("RGB", (self.width, self.height), self.bg)
+        draw = ImageDraw.Draw(self.base)
+        self.paint_static(draw)
+        for widget in self.widgets.values():
+            if widget.static:
+                widget.static(draw)
+        self.base565 = np.empty((self.height, self.width), dtype=np.uint16)
+        converter.convert(self.base, out=self.base565)
+        self.canvas = self.base.copy()
+        self.draw = ImageDraw.Draw(self.canvas)
+
+    def text(self, xy, text, fill, font):
+        """Draw text on the canvas through text_cache; returns the bbox it covers"""
+        return text_cache.draw(self.canvas, xy, text, fill, font)
+
+    def restore(self, rect):
+        """Put the base layer back under a widget rectangle"""
+        box = (max(rect[0], 0), max(rect[1], 0), min(rect[2], self.width), min(rect[3], self.height))
+        if box[2] > box[0] and box[3] > box[1]:
+            self.canvas.paste(self.base.crop(box), box[:2])
+
+    def present(self, fb_array, converter):
+        """Flush to the framebuffer; returns the rectangles written (whole screen first on takeover)"""
+        global screen_owner
+        if self.base is None:
+            self.render_base(converter)
+        rects = []
+        written = []
+        if screen_owner is not self:
+            if self.warm:
+                fb_array[:, :] = self.frame565
+            else:
+                fb_array[:, :] = self.base565
+                self.canvas.paste(self.base)
+                for widget in self.widgets.values():
+                    widget.reset()
+            self.flushed_pixels += self.width * self.height
+            screen_owner = self
+            self.warm = False  # updates on screen go straight to the framebuffer from now on
+            written.append((0, 0, self.width, self.height))
+        for widget in self.widgets.values():
+            if widget.dirty:
+                rect = widget.render(self)
+                if rect:
+                    rects.append(rect)
+        for rect in rects:
+            self.flush(rect, fb_array, converter)
+        return written + rects
+
+    def prepare(self, converter):
+        """Off screen: bring the canvas and frame565 up to date so the next present() is one copy"""
+        if screen_owner is self:
+            return
+        if self.base is None:
+            self.render_base(converter)
+        if not self.warm:
+            if self.frame565 is None:
+                self.frame565 = np.empty((self.height, self.width), dtype=np.uint16)
+            self.frame565[:, :] = self.base565
+            self.canvas.paste(self.base)
+            for widget in self.widgets.values():
+                widget.reset()
+            self.warm = True
+        for widget in self.widgets.values():
+            if widget.dirty:
+                rect = widget.render(self)
+                if rect:
+                    self.flush(rect, self.frame565, converter)
+
+    def flush(self, rect, fb_array, converter):
+        x1, y1 = max(rect[0], 0), max(rect[1], 0)
+        x2, y2 = min(rect[2], self.width), min(rect[3], self.height)
+        if x2 <= x1 or y2 <= y1:
+            return
+        converter.convert(self.canvas.crop((x1, y1, x2, y2)), out=fb_array[y1:y2, x1:x2])
+        self.flushed_pixels += (x2 - x1) * (y2 - y1)
@@ -0,0 +1,659 @@
+#!/usr/bin/env python3
+"""
+Windows Agent Data Sources
+Long-lived telemetry sources for windows_streamdeck_agent.py, kept apart
+from the Flask/pyautogui parts so they can be exercised on any machine.
+
+GpuTelemetry keeps the latest GPU reading without forking per sample:
+NVML through pynvml when it is installed, otherwise one long-running
+`nvidia-smi --query-gpu=... -lms N` whose CSV lines are parsed as they
+stream in. The process is restarted with backoff if it dies; pass another
+command (e.g. benchmarks/fake_nvidia_smi.py) to run without a GPU.
+
+LhmSensors reads CPU temperature and fan speeds from LibreHardwareMonitor's
+data.json over one keep-alive session. The tree is walked once to index
+the needed sensors by SensorId; later reads follow the indexed paths and
+only re-index when the tree's shape changes.
+
+DockerEngine talks to the Docker Engine API over its local socket (named
+pipe on Windows, unix socket elsewhere, or DOCKER_HOST) instead of running
+the docker CLI. It lists containers and images once, then keeps the
+table current from the /events stream, re-reading only the container an
+event names; the agent's endpoints read the table from memory.
+benchmarks/fake_dockerd.py stands in for dockerd.
+
+TopicPublisher turns the agent's snapshots into per-topic field deltas
+for WebSocket subscribers, each change encoded once and shared by every
+client with the same subscription.
+
+Copy this file next to windows_streamdeck_agent.py.
+
+Requirements: pip install requests (pynvml optional)
+"""
+
+import http.client
+import io
+import json
+import os
+import requests
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+# Hide subprocess console windows on Windows
+CREATE_NO_WINDOW = 0x08000000 if sys.platform == 'win32' else 0
+
+GPU_FIELDS = ("index,utilization.gpu,memory.used,memory.total,temperature.gpu,fan.speed,"
+              "power.draw,power.limit,clocks.current.graphics,name")
+NVIDIA_SMI = ["nvidia-smi"]
+
+def parse_gpu_line(line):
+    """One `nvidia-smi --query-gpu=GPU_FIELDS --format=csv,noheader,nounits` line -> (index, stats)"""
+    parts = [p.strip() for p in line.strip().split(', ')]
+    if len(parts) < 9:
+        raise ValueError(f"short nvidia-smi line: {line!r}")
+    def number(value, cast):
+        return cast(float(value)) if value not in ('[N/A]', '[Not Supported]', '') else 0
+    return int(parts[0]), {
+        'gpu_percent': number(parts[1], int),
+        'gpu_mem_used_mb': number(parts[2], int),
+        'gpu_mem_total_mb': number(parts[3], int),
+        'gpu_temp': number(parts[4], int),
+        'gpu_fan_percent': number(parts[5], int),
+        'gpu_power_w': number(parts[6], lambda v: round(v, 1)),
+        'gpu_power_limit_w': number(parts[7], lambda v: round(v, 1)),
+        'gpu_clock_mhz': number(parts[8], int),
+        'gpu_name': ', '.join(parts[9:]) if len(parts) > 9 else 'Unknown',
+    }
+
+class GpuTelemetry(threading.Thread):
+    """Latest reading of GPU 0, refreshed every interval_ms by NVML or a streaming nvidia-smi.
+
+    latest() returns the stats dict, or None when there has been no reading
+    for stale_after seconds (no GPU, driver gone, process stuck).
+    """
+
+    def __init__(self, interval_ms=1000, command=None, use_nvml=True, stale_after=5.0,
+                 backoff=1.0, max_backoff=60.0):
+        super().__init__(name="gpu-telemetry", daemon=True)
+        self.interval_ms = interval_ms
+        self.command = command or NVIDIA_SMI
+        self.use_nvml = use_nvml and pynvml is not None
+        self.stale_after = stale_after
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.reading = None
+        self.read_at = 0.0
+        self.samples = 0
+        self.restarts = 0
+        self.source = None  # "nvml" / "nvidia-smi" once one works
+        self.process = None
+
+    def latest(self):
+        with self.lock:
+            if self.reading is None or time.monotonic() - self.read_at > self.stale_after:
+                return None
+            return dict(self.reading)
+
+    def store(self, reading):
+        with self.lock:
+            self.reading = reading
+            self.read_at = time.monotonic()
+            self.samples += 1
+
+    def run(self):
+        if self.use_nvml:
+            try:
+                self.run_nvml()
+            except Exception as e:
+                print(f"[GPU] NVML unavailable ({e}), streaming nvidia-smi instead")
+        delay = self.backoff
+        while True:
+            started = time.monotonic()
+            try:
+                self.run_smi()
+            except FileNotFoundError:
+                delay = self.max_backoff  # no nvidia-smi on this machine, look again rarely
+            except Exception as e:
+                print(f"[GPU] nvidia-smi stream error: {e}")
+            if time.monotonic() - started > 10 * self.interval_ms / 1000:
+                delay = self.backoff  # it streamed for a while, restart quickly
+            self.restarts += 1
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def run_smi(self):
+        """Parse readings as nvidia-smi streams them; returns when the process exits"""
+        self.process = subprocess.Popen(
+            self.command + [f"--query-gpu={GPU_FIELDS}", "--format=csv,noheader,nounits", "-lms", str(self.interval_ms)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+            creationflags=CREATE_NO_WINDOW)
+        try:
+            for line in self.process.stdout:
+                try:
+                    index, reading = parse_gpu_line(line)
+                except ValueError:
+                    continue
+                if index == 0:
+                    self.source = "nvidia-smi"
+                    self.store(reading)
+        finally:
+            self.stop_process()
+
+    def stop_process(self):
+        process, self.process = self.process, None
+        if process and process.poll() is None:
+            process.kill()
+            process.wait()
+
+    def run_nvml(self):
+        pynvml.nvmlInit()
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        name = pynvml.nvmlDeviceGetName(handle)
+        name = name.decode() if isinstance(name, bytes) else name
+        self.source = "nvml"
+        while True:
+            started = time.monotonic()
+            mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            try:
+                fan = pynvml.nvmlDeviceGetFanSpeed(handle)
+            except pynvml.NVMLError:
+                fan = 0  # passively cooled / not supported
+            self.store({
+                'gpu_percent': pynvml.nvmlDeviceGetUtilizationRates(handle).gpu,
+                'gpu_mem_used_mb': mem.used // (1024 * 1024),
+                'gpu_mem_total_mb': mem.total // (1024 * 1024),
+                'gpu_temp': pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU),
+                'gpu_fan_percent': fan,
+                'gpu_power_w': round(pynvml.nvmlDeviceGetPowerUsage(handle) / 1000, 1),
+                'gpu_power_limit_w': round(pynvml.nvmlDeviceGetEnforcedPowerLimit(handle) / 1000, 1),
+                'gpu_clock_mhz': pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_GRAPHICS),
+                'gpu_name': name,
+            })
+            time.sleep(max(0.0, started + self.interval_ms / 1000 - time.monotonic()))
+
+    def stats(self):
+        return f"{self.source or 'no GPU'}, {self.samples} samples, {self.restarts} restarts"
+
+# ============== LIBREHARDWAREMONITOR ==============
+
+LHM_URL = "http://localhost:8085/data.json"
+
+def tree_shape(node):
+    """Cheap fingerprint of an LHM tree without walking it.
+
+    LHM numbers nodes in pre-order, so the id of the last node is the node
+    count - 1: following the last child down to it notices any sensor or
+    hardware added or removed anywhere in the tree.
+    """
+    counts = []
+    while True:
+        children = node.get('Children') or []
+        counts.append(len(children))
+        if not children:
+            return node.get('id'), tuple(counts)
+        node = children[-1]
+
+def is_cpu_temp(node):
+    text = node.get('Text', '')
+    return 'CPU' in text and 'Core' in text and bool(node.get('Min')) and '°C' in str(node.get('Value', ''))
+
+def is_fan(node):
+    return node.get('Type', '') == 'Fan'
+
+class LhmSensors:
+    """CPU temperature and fan RPMs from LibreHardwareMonitor's web server (port 8085).
+
+    build_index() walks data.json once and maps the SensorId of every CPU
+    core temperature and fan to its path of child indices; read() then
+    goes straight down those paths. A changed tree_shape(), or a path that
+    no longer ends at its SensorId, rebuilds the index.
+    """
+
+    def __init__(self, url=LHM_URL, timeout=2, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.shape = None
+        self.paths = {}      # SensorId -> tuple of child indices from the root
+        self.cpu_temps = []  # SensorIds in tree order; the first non-zero one wins
+        self.fans = []
+        self.fetches = 0
+        self.indexes = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return self.session.get(self.url, timeout=self.timeout).json()
+
+    def update(self):
+        return self.read(self.fetch())
+
+    def build_index(self, data):
+        self.paths, self.cpu_temps, self.fans = {}, [], []
+        stack = [(data, ())]
+        while stack:
+            node, path = stack.pop()
+            if not isinstance(node, dict):
+                continue
+            if is_cpu_temp(node) or is_fan(node):
+                sensor_id = node.get('SensorId') or path  # older LHM builds have no SensorId
+                self.paths[sensor_id] = path
+                (self.cpu_temps if is_cpu_temp(node) else self.fans).append(sensor_id)
+            children = node.get('Children', [])
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], path + (i,)))
+        self.shape = tree_shape(data)
+        self.indexes += 1
+
+    def sensor(self, data, sensor_id):
+        node = data
+        for i in self.paths[sensor_id]:
+            node = node['Children'][i]
+        if isinstance(sensor_id, str) and node.get('SensorId') != sensor_id:
+            raise KeyError(sensor_id)
+        return node
+
+    def read(self, data):
+        """{'cpu_temp': first CPU core temperature (0 if none), 'fans': [{'name', 'rpm', 'id'}]}"""
+        if tree_shape(data) != self.shape:
+            self.build_index(data)
+        try:
+            return self.lookup(data)
+        except (LookupError, TypeError):
+            self.build_index(data)
+            return self.lookup(data)
+
+    def lookup(self, data):
+        cpu_temp = 0
+        for sensor_id in self.cpu_temps:
+            value = str(self.sensor(data, sensor_id).get('Value', '0'))
+            try:
+                cpu_temp = float(value.replace('°C', '').strip())
+            except ValueError:
+                continue
+            if cpu_temp:
+                break
+        fans = []
+        for sensor_id in self.fans:
+            node = self.sensor(data, sensor_id)
+            value = str(node.get('Value', '0'))
+            if 'RPM' not in value:
+                continue
+            try:
+                rpm = int(float(value.replace('RPM', '').strip()))
+            except ValueError:
+                continue
+            fans.append({'name': node.get('Text', ''), 'rpm': rpm, 'id': node.get('SensorId', '')})
+        return {'cpu_temp': cpu_temp, 'fans': fans}
+
+    def stats(self):
+        return f"{self.fetches} fetches, {len(self.paths)} sensors indexed, {self.indexes} index builds"
+
+# ============== DOCKER ENGINE API ==============
+
+if sys.platform == 'win32':
+    DOCKER_HOST = os.environ.get('DOCKER_HOST', 'npipe:////./pipe/docker_engine')
+else:
+    DOCKER_HOST = os.environ.get('DOCKER_HOST', 'unix:///var/run/docker.sock')
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class PipeReader(io.RawIOBase):
+    """Read side of a named pipe for http.client; closing it leaves the pipe open for keep-alive"""
+
+    def __init__(self, pipe):
+        self.pipe = pipe
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.pipe.readinto(buffer)
+
+class PipeSocket:
+    """Just enough of a socket over a Windows named pipe for http.client.
+
+    Synchronous pipe I/O can't time out, so DockerEngine holds no lock
+    across a request and never makes a reader thread wait on one.
+    """
+
+    def __init__(self, path):
+        self.pipe = open(path, 'r+b', buffering=0)
+
+    def sendall(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[self.pipe.write(view):]
+
+    def makefile(self, mode):
+        return io.BufferedReader(PipeReader(self.pipe))
+
+    def close(self):
+        self.pipe.close()
+
+class NpipeHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, pipe_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.pipe_path = pipe_path
+
+    def connect(self):
+        self.sock = PipeSocket(self.pipe_path)
+
+def docker_connection(host, timeout=None):
+    """HTTP connection to a DOCKER_HOST: unix://path, npipe:////./pipe/name or tcp://host:port"""
+    if host.startswith('unix://'):
+        return UnixHTTPConnection(host[len('unix://'):], timeout)
+    if host.startswith('npipe://'):
+        return NpipeHTTPConnection(host[len('npipe://'):].replace('/', '\\'), timeout)
+    if host.startswith('tcp://'):
+        return http.client.HTTPConnection(host[len('tcp://'):], timeout=timeout)
+    raise ValueError(f"unsupported DOCKER_HOST: {host}")
+
+def format_ports(ports):
+    """Engine API port list -> `docker ps` PORTS column"""
+    parts = []
+    for p in sorted(ports, key=lambda p: (p.get('PrivatePort', 0), p.get('IP', ''))):
+        if p.get('PublicPort'):
+            ip = p.get('IP', '')
+            ip = f"[{ip}]" if ':' in ip else ip
+            parts.append(f"{ip}:{p['PublicPort']}->{p['PrivatePort']}/{p.get('Type', 'tcp')}")
+        else:
+            parts.append(f"{p['PrivatePort']}/{p.get('Type', 'tcp')}")
+    return ', '.join(dict.fromkeys(parts))
+
+def container_row(c):
+    """Engine API container -> the dict `docker ps --format {{json .}}` used to give the agent"""
+    names = [n[1:] for n in c.get('Names') or [] if '/' not in n[1:]]
+    return {
+        'name': ','.join(names),
+        'image': c.get('Image', ''),
+        'status': c.get('Status', ''),
+        'ports': format_ports(c.get('Ports') or []),
+        'state': c.get('State', ''),
+        'id': c.get('Id', '')[:12],
+    }
+
+class DockerEngine:
+    """In-memory container table kept current from the Docker Engine API.
+
+    start() runs a thread that subscribes to /events, then lists every
+    container and the images once. Each container event re-reads just that
+    container over a keep-alive connection (destroy drops it), image events
+    re-count images. containers() and summary() only read the table; every
+    `resync` seconds one of them starts a background relist, which also
+    ages the "Up 5 minutes" status text. A relist that an event update
+    overtook is discarded (the changes counter moved). The stream
+    reconnects with backoff.
+    """
+
+    IGNORED_ACTIONS = ('exec_', 'attach', 'resize', 'top', 'export', 'archive-path', 'extract-to-dir')
+
+    def __init__(self, host=None, timeout=5, resync=60.0, backoff=1.0, max_backoff=30.0):
+        self.host = host or DOCKER_HOST
+        self.timeout = timeout
+        self.resync = resync
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()      # table, images, connected, error
+        self.api_lock = threading.Lock()  # idle keep-alive connections, never held during I/O
+        self.idle = []
+        self.table = {}  # full id -> (created, row)
+        self.images = 0
+        self.connected = False
+        self.error = 'Docker not connected yet'
+        self.synced_at = 0.0
+        self.changes = 0  # event-driven table updates, so a relist can tell it was overtaken
+        self.resyncing = False
+        self.requests = 0
+        self.events = 0
+        self.syncs = 0
+
+    def start(self):
+        threading.Thread(target=self.watch, name="docker-events", daemon=True).start()
+
+    def request(self, path):
+        while True:
+            with self.api_lock:
+                api = self.idle.pop() if self.idle else None
+            reused = api is not None
+            if not reused:
+                api = docker_connection(self.host, self.timeout)
+            try:
+                api.request("GET", path)
+                response = api.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                api.close()
+                if reused:
+                    continue  # stale keep-alive connection, try the next one
+                raise
+            with self.api_lock:
+                self.idle.append(api)
+                self.requests += 1
+            if response.status >= 400:
+                raise RuntimeError(f"Docker API {path}: HTTP {response.status}")
+            return json.loads(body)
+
+    def sync(self):
+        """Relist everything; returns False if an event update landed meanwhile and the list was dropped"""
+        with self.lock:
+            changes = self.changes
+        containers = self.request('/containers/json?all=1')
+        images = self.request('/images/json')
+        with self.lock:
+            if self.changes != changes:
+                return False
+            self.table = {c['Id']: (c.get('Created', 0), container_row(c)) for c in containers}
+            self.images = len(images)
+            self.synced_at = time.monotonic()
+            self.syncs += 1
+        return True
+
+    def refresh_container(self, container_id):
+        filters = quote(json.dumps({'id': [container_id]}))
+        found = self.request(f'/containers/json?all=1&filters={filters}')
+        with self.lock:
+            self.changes += 1
+            self.table.pop(container_id, None)
+            for c in found:
+                self.table[c['Id']] = (c.get('Created', 0), container_row(c))
+
+    def handle_event(self, event):
+        self.events += 1
+        action = event.get('Action') or event.get('status') or ''
+        if event.get('Type') == 'container':
+            if action.startswith(self.IGNORED_ACTIONS):
+                return
+            container_id = (event.get('Actor') or {}).get('ID') or event.get('id')
+            if action == 'destroy':
+                with self.lock:
+                    self.changes += 1
+                    self.table.pop(container_id, None)
+            else:
+                self.refresh_container(container_id)
+        elif event.get('Type') == 'image':
+            images = self.request('/images/json')
+            with self.lock:
+                self.changes += 1
+                self.images = len(images)
+
+    def watch(self):
+        delay = self.backoff
+        while True:
+            events = None
+            try:
+                events = docker_connection(self.host)
+                filters = quote(json.dumps({'type': ['container', 'image']}))
+                events.request("GET", f"/events?filters={filters}")
+                response = events.getresponse()
+                if response.status != 200:
+                    raise RuntimeError(f"Docker API /events: HTTP {response.status}")
+                # Listed after subscribing, so nothing between the two is missed
+                self.sync()
+                with self.lock:
+                    self.connected, self.error = True, None
+                delay = self.backoff
+                while True:
+                    line = response.readline()
+                    if not line:
+                        raise ConnectionError("event stream closed")
+                    if line.strip():
+                        self.handle_event(json.loads(line))
+            except (FileNotFoundError, ConnectionRefusedError):
+                self.set_error('Docker not running')
+            except Exception as e:
+                self.set_error(str(e))
+            finally:
+                if events:
+                    events.close()
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def set_error(self, error):
+        with self.lock:
+            self.connected, self.error = False, error
+
+    def maybe_resync(self):
+        """Start a background relist when the last one is `resync` seconds old; never waits on Docker"""
+        with self.lock:
+            if not self.connected or self.resyncing or time.monotonic() - self.synced_at <= self.resync:
+                return
+            self.resyncing = True
+        threading.Thread(target=self.background_sync, name="docker-resync", daemon=True).start()
+
+    def background_sync(self):
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"[Docker] resync failed: {e}")
+        finally:
+            self.resyncing = False
+
+    def containers(self):
+        """Running containers, newest first, like `docker ps`"""
+        self.maybe_resync()
+        with self.lock:
+            if not self.connected:
+                return {'error': self.error, 'containers': []}
+            rows = [row for _, row in sorted(self.table.values(), key=lambda item: -item[0]) if row['state'] == 'running']
+        return {'containers': rows, 'count': len(rows)}
+
+    def summary(self):
+        self.maybe_resync()
+        with self.lock:
+            if not self.connected:
+                return {'error': self.error, 'running': 0, 'total': 0, 'images': 0}
+            total = len(self.table)
+            running = sum(1 for _, row in self.table.values() if row['state'] == 'running')
+            return {'running': running, 'total': total, 'stopped': total - running, 'images': self.images}
+
+    def stats(self):
+        return f"{len(self.table)} containers, {self.events} events, {self.requests} API requests, {self.syncs} full syncs"
+
+# ============== WEBSOCKET TOPICS ==============
+
+# system_stats fields per WebSocket topic; anything else goes to "system"
+SYSTEM_TOPICS = {
+    "cpu": ("cpu_percent", "cpu_count", "cpu_freq_current", "cpu_freq_max", "cpu_temp"),
+    "cores": ("cpu_per_core",),
+    "memory": ("ram_percent", "ram_used_gb", "ram_total_gb", "ram_available_gb"),
+    "disk": ("disk_percent", "disk_used_gb", "disk_total_gb", "disk_free_gb"),
+    "network": ("net_sent_gb", "net_recv_gb"),
+    "gpu": ("gpu_percent", "gpu_mem_used_mb", "gpu_mem_total_mb", "gpu_temp", "gpu_fan_percent",
+            "gpu_power_w", "gpu_power_limit_w", "gpu_clock_mhz", "gpu_name"),
+    "fans": ("cpu_fan_rpm", "fans"),
+}
+TOPICS = tuple(SYSTEM_TOPICS) + ("system", "docker")
+FIELD_TOPICS = {field: topic for topic, fields in SYSTEM_TOPICS.items() for field in fields}
+HEARTBEAT = '{"type": "heartbeat"}'
+
+def split_system_stats(stats):
+    """collect_system_stats() dict -> {topic: {field: value}} with every system topic present"""
+    topics = {topic: {} for topic in SYSTEM_TOPICS}
+    topics["system"] = {}
+    for field, value in stats.items():
+        topics[FIELD_TOPICS.get(field, "system")][field] = value
+    return topics
+
+class TopicPublisher:
+    """Field-level deltas of the agent's snapshots for topic subscribers.
+
+    publish() diffs each topic against what was last published; a changed
+    topic gets the next seq and its delta ({"seq", "set", "unset"}) is
+    encoded once. message() splices those fragments into the text for one
+    subscription, cached until the next publish so clients subscribed to
+    the same topics share it. A client applies a delta whose seq is its
+    last + 1, skips older ones, and re-subscribes for a snapshot on a gap.
+    """
+
+    def __init__(self):
+        self.state = {}      # topic -> fields as last published
+        self.seqs = {}       # topic -> seq of its last change
+        self.fragments = {}  # topic -> encoded delta, topics changed by the last publish only
+        self.snapshots = {}  # topic -> encoded full state, dropped when the topic changes
+        self.cache = {}      # (kind, topics) -> message text since the last publish
+        self.encoded = 0
+
+    def publish(self, topics):
+        """New {topic: {field: value}} values; returns True if any topic changed"""
+        self.fragments, self.cache = {}, {}
+        for name, fields in topics.items():
+            old = self.state.get(name)
+            if old == fields:
+                continue
+            old = old or {}
+            delta = {"seq": self.seqs.get(name, 0) + 1,
+                     "set": {k: v for k, v in fields.items() if k not in old or old[k] != v}}
+            removed = [k for k in old if k not in fields]
+            if removed:
+                delta["unset"] = removed
+            self.seqs[name] = delta["seq"]
+            self.state[name] = fields
+            self.fragments[name] = json.dumps(delta)
+            self.snapshots.pop(name, None)
+            self.encoded += 1
+        return bool(self.fragments)
+
+    def unchanged(self):
+        """Nothing new this tick: every delta message becomes a heartbeat"""
+        self.fragments, self.cache = {}, {}
+
+    def snapshot_fragment(self, name):
+        text = self.snapshots.get(name)
+        if text is None:
+            text = self.snapshots[name] = json.dumps({"seq": self.seqs[name], "set": self.state[name]})
+            self.encoded += 1
+        return text
+
+    def message(self, kind, topics):
+        """"snapshot" or "delta" message text for a sorted tuple of topics"""
+        key = (kind, topics)
+        text = self.cache.get(key)
+        if text is None:
+            if kind == "snapshot":
+                parts = [f'"{name}": {self.snapshot_fragment(name)}' for name in topics if name in self.state]
+            else:
+                parts = [f'"{name}": {self.fragments[name]}' for name in topics if name in self.fragments]
+            if kind == "delta" and not parts:
+                text = HEARTBEAT
+            else:
+                text = f'{{"type": "{kind}", "topics": {{{", ".join(parts)}}}}}'
+            self.cache[key] = text
+        return text
@@ -2,24 +2,21 @@
 """
 Windows Stream Deck Agent
 Bu scripti Windows PC'de çalıştır.
-Gerekli: pip install flask pyautogui psutil
+Gerekli: pip install flask pyautogui psutil (opsiyonel: pynvml)
 """
 
 from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler
 from urllib.parse import unquote
 import pyautogui
 import subprocess
 import os
 import json
 import time
-import requests
-import sys
 import asyncio
 import threading
 import websockets
-
-# Hide subprocess console windows on Windows
-CREATE_NO_WINDOW = 0x08000000 if sys.platform == 'win32' else 0
+from windows_agent_sources import DockerEngine, GpuTelemetry, LhmSensors, TopicPublisher, TOPICS, split_system_stats
 
 app = Flask(__name__)
 
@@ -93,19 +90,34 @@ def launch_app():
 
 import psutil
 
+# Non-blocking cpu_percent: each call measures since the previous one, which
+# the sampler makes every SAMPLE_INTERVAL; these prime the counters
+psutil.cpu_percent(interval=None)
+psutil.cpu_percent(interval=None, percpu=True)
+
+# One NVML poller / streaming nvidia-smi instead of a fork per sample
+GPU_INTERVAL_MS = 1000
+gpu = GpuTelemetry(interval_ms=GPU_INTERVAL_MS)
+
+# LibreHardwareMonitor sensors, indexed by SensorId, fetched over one keep-alive session
+lhm = LhmSensors()
+
+# Docker Engine API over its local pipe/socket, container table kept current from /events
+docker = DockerEngine()
+
 def collect_system_stats():
     """Collect Windows system stats (CPU, RAM, Disk, GPU, Temps, Fans)"""
     stats = {}
     try:
         # CPU
-        stats['cpu_percent'] = psutil.cpu_percent(interval=0.5)
+        stats['cpu_percent'] = psutil.cpu_percent(interval=None)
         stats['cpu_count'] = psutil.cpu_count()
         freq = psutil.cpu_freq()
         stats['cpu_freq_current'] = round(freq.current, 0) if freq else 0
         stats['cpu_freq_max'] = round(freq.max, 0) if freq else 0
 
         # CPU per-core usage
-        stats['cpu_per_core'] = psutil.cpu_percent(interval=0.1, percpu=True)
+        stats['cpu_per_core'] = psutil.cpu_percent(interval=None, percpu=True)
 
         # RAM
         mem = psutil.virtual_memory()
@@ -126,28 +138,11 @@ def collect_system_stats():
         stats['net_sent_gb'] = round(net.bytes_sent / (1024**3), 2)
         stats['net_recv_gb'] = round(net.bytes_recv / (1024**3), 2)
 
-        # GPU (nvidia-smi with extended info)
-        try:
-            gpu_result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,temperature.gpu,fan.speed,power.draw,power.limit,clocks.current.graphics,name', '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=5, creationflags=CREATE_NO_WINDOW
-            )
-            if gpu_result.returncode == 0:
-                parts = [p.strip() for p in gpu_result.stdout.strip().split(', ')]
-                stats['gpu_percent'] = int(parts[0])
-                stats['gpu_mem_used_mb'] = int(parts[1])
-                stats['gpu_mem_total_mb'] = int(parts[2])
-                stats['gpu_temp'] = int(parts[3])
-                stats['gpu_fan_percent'] = int(parts[4]) if parts[4] != '[N/A]' else 0
-                stats['gpu_power_w'] = round(float(parts[5]), 1) if parts[5] != '[N/A]' else 0
-                stats['gpu_power_limit_w'] = round(float(parts[6]), 1) if parts[6] != '[N/A]' else 0
-                stats['gpu_clock_mhz'] = int(parts[7]) if parts[7] != '[N/A]' else 0
-                stats['gpu_name'] = parts[8] if len(parts) > 8 else 'Unknown'
-            else:
-                stats['gpu_percent'] = 0
-                stats['gpu_temp'] = 0
-                stats['gpu_fan_percent'] = 0
-        except:
+        # GPU: latest reading of the long-lived NVML / nvidia-smi stream
+        gpu_stats = gpu.latest()
+        if gpu_stats:
+            stats.update(gpu_stats)
+        else:
             stats['gpu_percent'] = 0
             stats['gpu_temp'] = 0
             stats['gpu_fan_percent'] = 0
@@ -156,50 +151,10 @@ def collect_system_stats():
         stats['cpu_temp'] = 0
         stats['cpu_fan_rpm'] = 0
         try:
-            lhm_resp = requests.get('http://localhost:8085/data.json', timeout=2)
-            lhm_data = lhm_resp.json()
-
-            def find_cpu_temp(node):
-                """Recursively search for CPU temperature in LHM JSON"""
-                if isinstance(node, dict):
-                    text = node.get('Text', '')
-                    if 'CPU' in text and node.get('Min') and 'Core' in text:
-                        try:
-                            val = node.get('Value', '0')
-                            if '°C' in str(val):
-                                return float(val.replace('°C', '').strip())
-                        except:
-                            pass
-                    for child in node.get('Children', []):
-                        result = find_cpu_temp(child)
-                        if result:
-                            return result
-                return None
-
-            temp = find_cpu_temp(lhm_data)
-            if temp:
-                stats['cpu_temp'] = round(temp, 1)
-
-            def find_all_fans(node):
-                """Recursively collect all fan RPM values from LHM JSON"""
-                results = []
-                if isinstance(node, dict):
-                    sensor_type = node.get('Type', '')
-                    if sensor_type == 'Fan':
-                        try:
-                            val = node.get('Value', '0')
-                            if 'RPM' in str(val):
-                                rpm = int(float(val.replace('RPM', '').strip()))
-                                text = node.get('Text', '')
-                                sensor_id = node.get('SensorId', '')
-                                results.append({'name': text, 'rpm': rpm, 'id': sensor_id})
-                        except:
-                            pass
-                    for child in node.get('Children', []):
-                        results.extend(find_all_fans(child))
-                return results
-
-            all_fans = find_all_fans(lhm_data)
+            sensors = lhm.update()
+            if sensors['cpu_temp']:
+                stats['cpu_temp'] = round(sensors['cpu_temp'], 1)
+            all_fans = sensors['fans']
             active_fans = [f for f in all_fans if f['rpm'] > 0 and 'GPU' not in f['name']]
             stats['cpu_fan_rpm'] = active_fans[0]['rpm'] if active_fans else 0
             stats['fans'] = all_fans
@@ -218,120 +173,160 @@ def collect_system_stats():
         return {'error': str(e)}
 
 def collect_docker_data():
-    """Collect running Docker containers as dict"""
-    try:
-        result = subprocess.run(
-            ['docker', 'ps', '--format', '{{json .}}'],
-            capture_output=True, text=True, timeout=10, creationflags=CREATE_NO_WINDOW
-        )
-        containers = []
-        for line in result.stdout.strip().split('\n'):
-            if line:
-                try:
-                    c = json.loads(line)
-                    containers.append({
-                        'name': c.get('Names', ''),
-                        'image': c.get('Image', ''),
-                        'status': c.get('Status', ''),
-                        'ports': c.get('Ports', ''),
-                        'state': c.get('State', ''),
-                        'id': c.get('ID', '')[:12]
-                    })
-                except json.JSONDecodeError:
-                    pass
-        return {'containers': containers, 'count': len(containers)}
-    except subprocess.TimeoutExpired:
-        return {'error': 'Docker command timed out', 'containers': []}
-    except FileNotFoundError:
-        return {'error': 'Docker not found', 'containers': []}
-    except Exception as e:
-        return {'error': str(e), 'containers': []}
+    """Running Docker containers from the event-fed table (no docker CLI)"""
+    return docker.containers()
+
+# ============== BACKGROUND SAMPLER ==============
+
+SAMPLE_INTERVAL = 1.0  # seconds between system stats samples
+DOCKER_INTERVAL = 1.0  # seconds between reads of the Docker container table
+IDLE_AFTER = 30        # seconds without a reader before a sampler pauses
+
+class Sampler(threading.Thread):
+    """Keeps one versioned snapshot of collect() fresh on its own thread.
+
+    HTTP and WebSocket consumers read the latest snapshot and its JSON,
+    encoded once per sample, instead of collecting per request. The
+    version only moves when the data changed. With nobody reading for
+    IDLE_AFTER seconds sampling pauses; the next read wakes it and waits
+    for a fresh sample rather than serving the old one.
+    """
+
+    def __init__(self, name, collect, interval):
+        super().__init__(name=f"sample-{name}", daemon=True)
+        self.collect = collect
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.value = None
+        self.body = None
+        self.version = 0
+        self.last_read = time.monotonic()
+        self.paused = False
+        self.ready = threading.Event()
+        self.wakeup = threading.Event()
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            value = self.collect()
+            body = json.dumps(value)
+            with self.lock:
+                if body != self.body:
+                    self.version += 1
+                self.value, self.body = value, body
+            self.ready.set()
+            with self.lock:
+                self.paused = time.monotonic() - self.last_read > IDLE_AFTER
+                if self.paused:
+                    self.wakeup.clear()
+            if self.paused:
+                self.wakeup.wait()
+            else:
+                time.sleep(max(0.0, started + self.interval - time.monotonic()))
+
+    def read(self, wait=True):
+        """(version, value, JSON body) of the latest sample.
+
+        Version 0 = nothing fresh yet: not sampled, or a paused sampler this
+        read just woke, whose old sample could be arbitrarily stale.
+        """
+        with self.lock:
+            self.last_read = time.monotonic()
+            if self.paused:
+                self.paused = False
+                self.ready.clear()
+                self.wakeup.set()
+        if wait:
+            self.ready.wait()
+        with self.lock:
+            if not self.ready.is_set():
+                return 0, None, None
+            return self.version, self.value, self.body
+
+system_sampler = Sampler("system", collect_system_stats, SAMPLE_INTERVAL)
+docker_sampler = Sampler("docker", collect_docker_data, DOCKER_INTERVAL)
+
+def snapshot_response(sampler):
+    version, _, body = sampler.read()
+    return app.response_class(body, mimetype="application/json", headers={"X-Sample-Version": str(version)})
 
 # ============== SYSTEM STATS ENDPOINT ==============
 
 @app.route("/system/stats")
 def system_stats():
     """Return Windows system stats (CPU, RAM, Disk, GPU, Temps, Fans)"""
-    return jsonify(collect_system_stats())
+    return snapshot_response(system_sampler)
 
 # ============== DOCKER ENDPOINTS ==============
 
 @app.route("/docker/containers")
 def docker_containers():
     """Return running Docker containers as JSON"""
-    return jsonify(collect_docker_data())
+    return snapshot_response(docker_sampler)
 
 @app.route("/docker/stats")
 def docker_stats():
     """Return Docker system stats"""
-    try:
-        ps_result = subprocess.run(
-            ['docker', 'ps', '-q'],
-            capture_output=True, text=True, timeout=5, creationflags=CREATE_NO_WINDOW
-        )
-        running = len([x for x in ps_result.stdout.strip().split('\n') if x])
-
-        ps_all = subprocess.run(
-            ['docker', 'ps', '-aq'],
-            capture_output=True, text=True, timeout=5, creationflags=CREATE_NO_WINDOW
-        )
-        total = len([x for x in ps_all.stdout.strip().split('\n') if x])
-
-        images = subprocess.run(
-            ['docker', 'images', '-q'],
-            capture_output=True, text=True, timeout=5, creationflags=CREATE_NO_WINDOW
-        )
-        image_count = len([x for x in images.stdout.strip().split('\n') if x])
-        
-        return jsonify({
-            'running': running,
-            'total': total,
-            'stopped': total - running,
-            'images': image_count
-        })
-    except Exception as e:
-        return jsonify({'error': str(e), 'running': 0, 'total': 0, 'images': 0})
+    return jsonify(docker.summary())
 
 # ============== WEBSOCKET SERVER ==============
 
 WS_PORT = 5556
 WS_INTERVAL = 3  # seconds between broadcasts
 
-ws_clients = set()
+# websocket -> sorted tuple of subscribed topics, None for clients that never
+# subscribed (older Pi scripts), which keep getting the full payload
+ws_clients = {}
+publisher = TopicPublisher()
 
 async def ws_handler(websocket):
-    """Handle new WebSocket connections"""
-    ws_clients.add(websocket)
+    """Handle new WebSocket connections; {"subscribe": [topics]} switches a client to snapshot + deltas"""
+    ws_clients[websocket] = None
     remote = websocket.remote_address
     print(f"[WS] Client connected: {remote}")
     try:
-        async for _ in websocket:
-            pass  # We only push, ignore incoming messages
+        async for message in websocket:
+            try:
+                topics = json.loads(message).get("subscribe")
+            except (ValueError, AttributeError):
+                continue
+            if isinstance(topics, list):
+                ws_clients[websocket] = tuple(sorted(set(topics) & set(TOPICS)))
+                await websocket.send(publisher.message("snapshot", ws_clients[websocket]))
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
-        ws_clients.discard(websocket)
+        ws_clients.pop(websocket, None)
         print(f"[WS] Client disconnected: {remote}")
 
 async def ws_broadcast_loop():
-    """Collect stats every WS_INTERVAL seconds and push to all clients"""
+    """Every WS_INTERVAL seconds send subscribers their topics' deltas (or a heartbeat), others the full payload"""
+    payload, versions = None, None
     while True:
         if ws_clients:
             try:
-                system_stats = collect_system_stats()
-                docker_data = collect_docker_data()
-                payload = json.dumps({
-                    "system_stats": system_stats,
-                    "docker_containers": docker_data
-                })
+                system_version, system_value, system_body = system_sampler.read(wait=False)
+                docker_version, docker_value, docker_body = docker_sampler.read(wait=False)
+                if not system_version or not docker_version:
+                    await asyncio.sleep(0.1)  # first samples, or the one after a pause, still running
+                    continue
+                if (system_version, docker_version) != versions:
+                    # Splice the pre-encoded snapshots instead of re-encoding them
+                    payload = f'{{"system_stats": {system_body}, "docker_containers": {docker_body}}}'
+                    versions = (system_version, docker_version)
+                    topics = split_system_stats(system_value)
+                    topics["docker"] = docker_value
+                    publisher.publish(topics)
+                else:
+                    publisher.unchanged()
                 dead = set()
-                for client in ws_clients.copy():
+                for client, topics in list(ws_clients.items()):
                     try:
-                        await client.send(payload)
+                        await client.send(payload if topics is None else publisher.message("delta", topics))
                     except websockets.exceptions.ConnectionClosed:
                         dead.add(client)
                 for c in dead:
-                    ws_clients.discard(c)
+                    ws_clients.pop(c, None)
             except Exception as e:
                 print(f"[WS] Broadcast error: {e}")
         await asyncio.sleep(WS_INTERVAL)
@@ -356,9 +351,18 @@ if __name__ == "__main__":
     print("Endpoints: /system/stats, /docker/containers, /docker/stats")
     print("=" * 50)
 
+    # Samplers first, so the first requests find a snapshot
+    gpu.start()
+    docker.start()
+    system_sampler.start()
+    docker_sampler.start()
+
     # Start WebSocket server in daemon thread
     ws_thread = threading.Thread(target=run_ws_server, daemon=True)
     ws_thread.start()
 
+    # HTTP/1.1 so the Pi's action session can keep its connection open
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+
     # Start Flask (blocking)
     app.run(host="0.0.0.0", port=5555, debug=False)